@@ -0,0 +1,136 @@
+# blink_detector.py
+import config
+from collections import namedtuple
+
+# Evento emitido al reabrir los ojos: duración del cierre y si fue un parpadeo voluntario (clic)
+BlinkEvent = namedtuple("BlinkEvent", ["start_ms", "duration_ms", "deliberate"])
+
+class RunningStats:
+    """
+    Media y varianza exponenciales del EAR de un ojo, O(1) por muestra.
+    Durante las primeras muestras se comporta como una media acumulada para arrancar rápido.
+    """
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+
+    def update(self, value, alpha=None):
+        self.count += 1
+        if self.count == 1:
+            self.mean = value; self.var = 0.0
+            return
+        a = max(self.alpha if alpha is None else alpha, 1.0 / self.count)
+        delta = value - self.mean
+        self.mean += a * delta
+        self.var = (1 - a) * (self.var + a * delta * delta)
+
+    @property
+    def std(self):
+        return self.var ** 0.5
+
+    def reset(self):
+        self.count = 0
+
+
+class BlinkDetector:
+    """
+    Detección de parpadeo adaptada a cada usuario usando ambos ojos.
+
+    - Línea base por ojo (media/varianza) actualizada con el ojo abierto; entre los umbrales de
+      cierre y reapertura aprende más despacio, para seguir caídas sostenidas del EAR (mirar
+      las filas de abajo, cansancio) sin que la reapertura quede fuera de alcance.
+    - Histéresis: umbral de cierre más bajo que el de reapertura.
+    - Un cierre solo cuenta como parpadeo si dura entre BLINK_MIN_DURATION_MS y BLINK_MAX_DURATION_MS.
+    - Los parpadeos de al menos BLINK_DELIBERATE_MIN_MS se clasifican como voluntarios.
+    - Arranque: la línea base se siembra con el primer frame y, durante BLINK_WARMUP_FRAMES,
+      aprende de todo frame no cerrado con umbrales relativos a la media, así también funciona
+      con ojos cuyo EAR abierto queda por debajo de EAR_THRESHOLD.
+    - Un cierre que pasa de BLINK_MAX_DURATION_MS no es un parpadeo: se fuerza la reapertura y
+      la línea base vuelve a arrancar desde el EAR actual.
+    """
+    def __init__(self, fallback_threshold=config.EAR_THRESHOLD):
+        # Umbral fijo usado solo mientras no hay ninguna muestra de la línea base
+        self.fallback_threshold = fallback_threshold
+        # Parámetros ajustables por instancia (session_eval los barre)
+        self.close_sigmas = config.BLINK_CLOSE_SIGMAS
+        self.close_min_drop = config.BLINK_CLOSE_MIN_DROP
+        self.deliberate_min_ms = config.BLINK_DELIBERATE_MIN_MS
+        self.stats = {"left": RunningStats(config.BLINK_BASELINE_ALPHA),
+                      "right": RunningStats(config.BLINK_BASELINE_ALPHA)}
+        self.is_closed = False
+        self.closed_since = None
+        self.blink_event = None  # Evento generado en el último update (o None)
+
+    def _thresholds(self, eye):
+        """Devuelve (umbral_cierre, umbral_reapertura) para un ojo."""
+        s = self.stats[eye]
+        if s.count == 0:
+            return self.fallback_threshold, self.fallback_threshold * (1 + config.BLINK_OPEN_MIN_DROP)
+        if s.count < config.BLINK_WARMUP_FRAMES:
+            # La varianza aún no es fiable: solo caídas relativas a la media
+            return s.mean * (1 - self.close_min_drop), s.mean * (1 - min(config.BLINK_OPEN_MIN_DROP, self.close_min_drop))
+        close_drop = max(self.close_sigmas * s.std, self.close_min_drop * s.mean)
+        open_drop = max(config.BLINK_OPEN_SIGMAS * s.std, config.BLINK_OPEN_MIN_DROP * s.mean)
+        return s.mean - close_drop, s.mean - min(open_drop, close_drop)
+
+    def eye_openness(self, eye, ear):
+        """Apertura de un ojo entre 0 (en el umbral de cierre o por debajo) y 1 (en su línea base)."""
+        if not ear or ear <= 0: return 0.0
+        close_thr, _ = self._thresholds(eye)
+        s = self.stats[eye]
+        baseline = s.mean if s.count else self.fallback_threshold / (1 - self.close_min_drop)
+        if baseline <= close_thr: return 1.0 if ear > close_thr else 0.0
+        return min(1.0, max(0.0, (ear - close_thr) / (baseline - close_thr)))
+
+    def get_baseline(self):
+        """EAR medio con el ojo abierto (promedio de los ojos con línea base), o None."""
+        means = [s.mean for s in self.stats.values() if s.count]
+        return sum(means) / len(means) if means else None
+
+    def update(self, left_ear, right_ear, now_ms):
+        """
+        Procesa el EAR de ambos ojos de un frame (0 o None = ojo no visible).
+        Devuelve el BlinkEvent si en este frame terminó un parpadeo válido.
+        """
+        self.blink_event = None
+        eyes = [(eye, ear) for eye, ear in (("left", left_ear), ("right", right_ear)) if ear and ear > 0]
+        if not eyes:
+            return None
+
+        unseeded = [(eye, e) for eye, e in eyes if self.stats[eye].count == 0]
+        if unseeded and not self.is_closed:
+            for eye, e in unseeded: self.stats[eye].update(e)  # Sembrar la línea base con el primer frame
+            return None
+
+        # Se compara el EAR promedio de los ojos visibles con el promedio de sus umbrales
+        ear = sum(e for _, e in eyes) / len(eyes)
+        thresholds = [self._thresholds(eye) for eye, _ in eyes]
+        close_thr = sum(t[0] for t in thresholds) / len(thresholds)
+        open_thr = sum(t[1] for t in thresholds) / len(thresholds)
+
+        if not self.is_closed:
+            if ear < close_thr:
+                self.is_closed = True
+                self.closed_since = now_ms
+            else:
+                # Con ojo abierto; entre los dos umbrales con menos peso (salvo en el arranque)
+                for eye, e in eyes:
+                    if ear > open_thr or self.stats[eye].count < config.BLINK_WARMUP_FRAMES:
+                        self.stats[eye].update(e)
+                    else:
+                        self.stats[eye].update(e, config.BLINK_BASELINE_DRIFT_ALPHA)
+        elif now_ms - self.closed_since > config.BLINK_MAX_DURATION_MS:
+            # Demasiado largo para un parpadeo: la línea base ya no describe el ojo abierto
+            self.is_closed = False
+            self.closed_since = None
+            for s in self.stats.values(): s.reset()
+        elif ear > open_thr:
+            self.is_closed = False
+            duration = now_ms - self.closed_since
+            if config.BLINK_MIN_DURATION_MS <= duration <= config.BLINK_MAX_DURATION_MS:
+                self.blink_event = BlinkEvent(self.closed_since, duration,
+                                              duration >= self.deliberate_min_ms)
+            self.closed_since = None
+        return self.blink_event
@@ -15,6 +15,7 @@ class Calibration:
             "v_ratio_for_screen_bottom_gaze": 0.75
         }
         self.is_calibrated = False
+        self.sensitivity_scaler = config.GAZE_SENSITIVITY_SCALER
         # interaction_area_rect_func es una función que se llamará para obtener el rect actual
         # Esto es útil si el rect puede cambiar (aunque en nuestro caso se define una vez)
         self.get_interaction_area_rect = interaction_area_rect_func
@@ -123,12 +124,12 @@ class Calibration:
         v_cal_top = self.calibration_data["v_ratio_for_screen_top_gaze"]
         v_cal_bottom = self.calibration_data["v_ratio_for_screen_bottom_gaze"]
         
-        calibrated_h_span = (h_cal_right - h_cal_left) * config.GAZE_SENSITIVITY_SCALER
-        calibrated_v_span = (v_cal_bottom - v_cal_top) * config.GAZE_SENSITIVITY_SCALER
+        calibrated_h_span = (h_cal_right - h_cal_left) * self.sensitivity_scaler
+        calibrated_v_span = (v_cal_bottom - v_cal_top) * self.sensitivity_scaler
 
         # Manejo de spans muy pequeños o nulos después de escalar
-        if abs(calibrated_h_span) < 0.01: calibrated_h_span = 0.5 * config.GAZE_SENSITIVITY_SCALER
-        if abs(calibrated_v_span) < 0.01: calibrated_v_span = 0.5 * config.GAZE_SENSITIVITY_SCALER
+        if abs(calibrated_h_span) < 0.01: calibrated_h_span = 0.5 * self.sensitivity_scaler
+        if abs(calibrated_v_span) < 0.01: calibrated_v_span = 0.5 * self.sensitivity_scaler
         
         norm_h = (current_h_ratio - h_cal_left) / calibrated_h_span if calibrated_h_span != 0 else 0.5
         norm_v = (current_v_ratio - v_cal_top) / calibrated_v_span if calibrated_v_span != 0 else 0.5
@@ -24,6 +24,13 @@ KEY_WIDTH = 90; KEY_HEIGHT = 90; KEY_MARGIN = 6; KEY_BORDER_RADIUS = 11
 KEYBOARD_INTERACTION_PADDING = 15
 KEYBOARD_START_Y_OFFSET_FROM_SUGGESTIONS = 20
 
+# Modo predictivo: las teclas con más probabilidad de ser la siguiente tienen un área de selección mayor
+PREDICTIVE_KEY_SIZING = False
+PREDICTIVE_KEY_VISUALS = False     # Agrandar también el dibujo (a la mitad del crecimiento del área)
+PREDICTIVE_MAX_GROW_PX = 30        # Crecimiento por lado de la tecla más probable
+PREDICTIVE_MIN_PROBABILITY = 0.05  # Por debajo de esto la tecla no crece
+PREDICTIVE_LAYOUT_BUDGET_MS = 5    # Aviso si recalcular el teclado tras una pulsación tarda más
+
 KEYBOARD_LAYOUT = [
     ['LEER','q', 'w', 'e', 'r', 't', 'y', 'u', 'i', 'o', 'p'],
     ['a', 's', 'd', 'f', 'g', 'h', 'j', 'k', 'l', 'BACKSPACE'], # <--- TU CAMBIO APLICADO
@@ -51,9 +58,14 @@ GAZE_POINTER_CROSSHAIR_LENGTH = 15
 GAZE_POINTER_COLOR_CALIBRATING = (255, 165, 0)
 
 # --- AJUSTES DE VELOCIDAD (Tus valores) ---
-GAZE_SMOOTHING_FACTOR = 0.07
+GAZE_SMOOTHING_FACTOR = 0.12 # Con la fusión de ambos ojos el ratio trae menos ruido (antes 0.07)
 GAZE_SENSITIVITY_SCALER = 1.7
 
+# --- Fusión de ambos ojos ---
+GAZE_FUSION_STABILITY_ALPHA = 0.2  # Peso de cada frame en la medida de inestabilidad de cada ojo
+GAZE_FUSION_MIN_VARIANCE = 1e-4    # Evita pesos infinitos con landmarks perfectamente quietos
+GAZE_FUSION_OFFSET_ALPHA = 0.02    # Velocidad con la que se aprende la diferencia media entre ojos
+
 # --- Calibración ---
 CALIBRATION_POINT_RADIUS = 18
 CALIBRATION_DURATION_PER_POINT_MS = 2500
@@ -63,11 +75,53 @@ VERTICAL_SENSITIVITY_MULTIPLIER = 1.6
 
 # --- Detección de Parpadeo / Selección ---
 USE_BLINK_FOR_SELECTION = True
+EAR_THRESHOLD = 0.24 # Umbral fijo de ojo cerrado mientras se aprende la línea base del usuario
+BLINK_BASELINE_ALPHA = 0.02   # Peso de cada muestra en la media/varianza del EAR con ojo abierto
+BLINK_BASELINE_DRIFT_ALPHA = 0.005 # Peso de las muestras entre cierre y reapertura (mirar abajo, cansancio)
+BLINK_WARMUP_FRAMES = 30      # Muestras necesarias antes de usar umbrales adaptativos
+BLINK_CLOSE_SIGMAS = 3.0; BLINK_CLOSE_MIN_DROP = 0.25  # Cierre: media - max(3σ, 25% de la media)
+BLINK_OPEN_SIGMAS = 1.5; BLINK_OPEN_MIN_DROP = 0.12    # Reapertura (histéresis): media - max(1.5σ, 12%)
+BLINK_MIN_DURATION_MS = 60    # Cierres más cortos se consideran ruido
+BLINK_MAX_DURATION_MS = 800   # Cierres más largos (ojos cerrados, mirar abajo) no son parpadeos
+BLINK_DELIBERATE_MIN_MS = 250 # Duración mínima de un parpadeo voluntario
+BLINK_CLICK_REQUIRES_DELIBERATE = True # Ignorar parpadeos naturales para hacer clic
 DWELL_TIME_MS = 900 # Tiempo de permanencia para seleccionar (si USE_BLINK_FOR_SELECTION es False)
+DWELL_TO_FREEZE_MS = 800  # Tiempo de fijación para congelar selección
+ACTION_WINDOW_MS = 1000   # Tiempo para realizar acción tras congelar
 
 
 # --- Archivo de Palabras ---
 SPANISH_WORDS_FILE = "palabras_es.txt"
 
+# --- Sugerencias tolerantes a errores de mirada ---
+FUZZY_MAX_COST = 1.0            # Costo máximo de edición para sugerir una palabra aproximada
+FUZZY_MIN_PREFIX_LENGTH = 2     # Con prefijos más cortos solo se usa coincidencia exacta
+FUZZY_ADJACENT_KEY_COST = 0.5   # Sustituir por una tecla vecina (a una tecla de distancia)
+FUZZY_EDIT_COST = 1.0           # Insertar, borrar o sustituir por una tecla lejana
+FUZZY_MAX_NODES = 600          # Tope de nodos del trie visitados por búsqueda (acota la latencia)
+
+# --- Autoguardado ---
+AUTOSAVE_JOURNAL_FILE = "autoguardado.journal"
+# Con flush() basta para sobrevivir a un cierre inesperado del programa. fsync también protege de
+# cortes de energía, pero bloquea el hilo de la interfaz en cada edición (lento en discos lentos)
+AUTOSAVE_FSYNC = False
+AUTOSAVE_SNAPSHOT_EVERY = 500   # Reescribir el diario como una sola instantánea cada N ediciones
+
+# --- Servidor de Eventos (integración con otras aplicaciones) ---
+EVENT_SERVER_ENABLED = False           # También se activa con: python main.py --event-server
+EVENT_SERVER_ADDRESS = "127.0.0.1:8765" # "host:puerto" o "unix:/ruta/al/socket"
+EVENT_SERVER_QUEUE_SIZE = 256          # Eventos pendientes por cliente antes de descartar los más viejos
+EVENT_SERVER_GAZE_DECIMATION = 3       # Publicar una de cada N muestras de mirada
+
+# --- Captura de Perfil (tecla P o python main.py --profile N) ---
+PROFILE_DURATION_S = 10          # Segundos que se perfila el bucle principal
+PROFILE_OUTPUT_DIR = "perfiles"  # Carpeta de los informes .pstats y .txt
+PROFILE_TOP_N = 25               # Funciones y sitios de asignación listados en el informe
+PROFILE_TRACEMALLOC_FRAMES = 1   # Profundidad de la pila guardada por asignación
+# Memoria máxima de tracemalloc durante una captura (~55 B por bloque vivo rastreado). La instantánea
+# final cuesta ~0.5 µs por bloque en el hilo de la interfaz: 1 MB ≈ 18k bloques ≈ 10 ms
+PROFILE_TRACEMALLOC_MAX_KB = 1024
+
 # --- Opciones de Depuración ---
+SHOW_DEBUG_CAMERA = True # Vista previa de la cámara (desactivarla ahorra copiar el frame en cada ciclo)
 SHOW_DEBUG_FACE_MESH = True
\ No newline at end of file
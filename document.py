@@ -0,0 +1,201 @@
+# document.py
+import bisect
+import json
+import os
+import config
+
+SEPARATORS = (' ', '\n')
+
+class TextDocument:
+    """
+    Texto escrito por el usuario guardado en un gap buffer: insertar y borrar junto al cursor
+    es O(1) amortizado (el teclado siempre escribe al final, así que el hueco nunca se mueve).
+    Las posiciones de los separadores (' ' y '\\n') se mantienen ordenadas, de modo que la
+    palabra actual se obtiene sin recorrer el texto.
+    Además del diario, `listeners` recibe cada edición con la misma interfaz que
+    DocumentJournal (record_insert / record_delete), p. ej. el servidor de eventos.
+    """
+    def __init__(self, text="", journal=None, capacity=256):
+        self._buf = [''] * max(capacity, 1)
+        self._gap_start = 0
+        self._gap_end = len(self._buf)
+        self._separators = []
+        self.version = 0         # Aumenta con cada cambio (para cachés de quien dibuja el texto)
+        self._dirty_from = 0     # Primera posición modificada desde el último take_dirty_from()
+        self.journal = None
+        self.listeners = []
+        self.insert(text)
+        self.journal = journal   # Se asigna después para no volver a registrar el texto inicial
+
+    # --- Acceso ---
+    def __len__(self):
+        return len(self._buf) - (self._gap_end - self._gap_start)
+
+    def __str__(self):
+        return "".join(self._buf[:self._gap_start]) + "".join(self._buf[self._gap_end:])
+
+    @property
+    def cursor(self):
+        return self._gap_start
+
+    def slice(self, start, end):
+        gap = self._gap_end - self._gap_start
+        if end <= self._gap_start: return "".join(self._buf[start:end])
+        if start >= self._gap_start: return "".join(self._buf[start + gap:end + gap])
+        return "".join(self._buf[start:self._gap_start]) + "".join(self._buf[self._gap_end:end + gap])
+
+    def current_word_start(self):
+        i = bisect.bisect_left(self._separators, self.cursor) - 1
+        return self._separators[i] + 1 if i >= 0 else 0
+
+    def current_word(self):
+        """Palabra que se está escribiendo (desde el último separador hasta el cursor)."""
+        return self.slice(self.current_word_start(), self.cursor)
+
+    def take_dirty_from(self):
+        """Devuelve la primera posición modificada desde la última llamada (len si no hubo cambios)."""
+        dirty_from = self._dirty_from
+        self._dirty_from = len(self)
+        return dirty_from
+
+    # --- Edición ---
+    def _mark_changed(self, position):
+        self.version += 1
+        self._dirty_from = min(self._dirty_from, position)
+
+    def _ensure_gap(self, size):
+        if self._gap_end - self._gap_start >= size: return
+        after = self._buf[self._gap_end:]
+        new_capacity = max(2 * len(self._buf), len(self) + size)
+        new_gap_end = new_capacity - len(after)
+        self._buf = self._buf[:self._gap_start] + [''] * (new_gap_end - self._gap_start) + after
+        self._gap_end = new_gap_end
+
+    def move_cursor(self, position):
+        position = max(0, min(position, len(self)))
+        if position < self._gap_start:
+            count = self._gap_start - position
+            self._buf[self._gap_end - count:self._gap_end] = self._buf[position:self._gap_start]
+            self._gap_start -= count; self._gap_end -= count
+        elif position > self._gap_start:
+            count = position - self._gap_start
+            self._buf[self._gap_start:self._gap_start + count] = self._buf[self._gap_end:self._gap_end + count]
+            self._gap_start += count; self._gap_end += count
+
+    def insert(self, text):
+        if not text: return
+        position = self.cursor
+        self._ensure_gap(len(text))
+        self._buf[position:position + len(text)] = list(text)
+        self._gap_start += len(text)
+        i = bisect.bisect_left(self._separators, position)
+        for j in range(i, len(self._separators)): self._separators[j] += len(text)
+        self._separators[i:i] = [position + k for k, c in enumerate(text) if c in SEPARATORS]
+        self._mark_changed(position)
+        if self.journal: self.journal.record_insert(position, text)
+        for listener in self.listeners: listener.record_insert(position, text)
+
+    def delete_before(self, count=1):
+        """Borra hasta count caracteres antes del cursor y devuelve el texto borrado."""
+        count = min(count, self.cursor)
+        if count <= 0: return ""
+        position = self.cursor - count
+        removed = "".join(self._buf[position:self._gap_start])
+        self._gap_start = position
+        i = bisect.bisect_left(self._separators, position)
+        j = bisect.bisect_left(self._separators, position + count)
+        del self._separators[i:j]
+        for k in range(i, len(self._separators)): self._separators[k] -= count
+        self._mark_changed(position)
+        if self.journal: self.journal.record_delete(position + count, count)
+        for listener in self.listeners: listener.record_delete(position + count, count)
+        return removed
+
+    def replace_current_word(self, word):
+        self.delete_before(self.cursor - self.current_word_start())
+        self.insert(word)
+
+    def clear(self):
+        self.move_cursor(len(self))
+        self.delete_before(len(self))
+
+
+class DocumentJournal:
+    """
+    Diario de autoguardado de solo escritura al final. Cada edición es una línea:
+      +<posición> <texto en JSON>    inserción
+      -<posición> <cantidad>         borrado de <cantidad> caracteres antes de <posición>
+    Una línea cortada por un cierre inesperado se ignora al recuperar. Cada cierto número de
+    operaciones el diario se reescribe como una sola inserción con el texto completo.
+    Al salir normalmente se borra con discard(): solo se recupera texto tras un cierre inesperado.
+    """
+    def __init__(self, path=config.AUTOSAVE_JOURNAL_FILE, fsync=config.AUTOSAVE_FSYNC):
+        self.path = path
+        self.fsync = fsync
+        self.document = None
+        self._ops_since_snapshot = 0
+        self._file = None
+
+    def recover(self):
+        """Reconstruye el documento a partir del diario y lo deja listo para seguir registrando."""
+        document = TextDocument()
+        try:
+            with open(self.path, 'r', encoding='utf-8', newline='') as f:
+                for line in f:
+                    if not line.endswith('\n'): break  # Escritura interrumpida
+                    try:
+                        position, _, payload = line[1:-1].partition(' ')
+                        document.move_cursor(int(position))
+                        if line[0] == '+': document.insert(json.loads(payload))
+                        elif line[0] == '-': document.delete_before(int(payload))
+                    except ValueError:
+                        print(f"Aviso: línea dañada en el diario de autoguardado ignorada: {line[:40]!r}")
+        except FileNotFoundError:
+            pass
+        document.move_cursor(len(document))
+        self.document = document
+        self.write_snapshot()
+        document.journal = self
+        return document
+
+    def write_snapshot(self):
+        # Temporal + rename: o queda el diario anterior completo o el nuevo, nunca uno a medias
+        text = str(self.document)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            if text: f.write(f"+0 {json.dumps(text, ensure_ascii=False)}\n")
+            f.flush()
+            if self.fsync: os.fsync(f.fileno())
+        if self._file: self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8', newline='')
+        self._ops_since_snapshot = 0
+
+    def _append(self, line):
+        self._file.write(line)
+        self._file.flush()
+        if self.fsync: os.fsync(self._file.fileno())
+        self._ops_since_snapshot += 1
+        if self._ops_since_snapshot >= config.AUTOSAVE_SNAPSHOT_EVERY: self.write_snapshot()
+
+    def record_insert(self, position, text):
+        self._append(f"+{position} {json.dumps(text, ensure_ascii=False)}\n")
+
+    def record_delete(self, position, count):
+        self._append(f"-{position} {count}\n")
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Cierra y borra el diario (salida normal): el próximo inicio empieza con el texto vacío."""
+        self.close()
+        if self.document is not None:
+            self.document.journal = None
+        for path in (self.path, self.path + ".tmp"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
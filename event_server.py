@@ -0,0 +1,227 @@
+# event_server.py
+"""
+Servidor local de eventos para controlar otras aplicaciones con el teclado por mirada.
+
+Publica, en JSON delimitado por saltos de línea (NDJSON), por un socket Unix o TCP local:
+  {"type": "hello", "ts": ..., "text": "...", "cursor": n}      al conectarse (texto actual)
+  {"type": "gaze", "ts": ..., "x": .., "y": .., "state": "NAVIGATING", "target": "a"}
+  {"type": "selection", "ts": ..., "kind": "key" | "suggestion", "value": "a"}
+  {"type": "edit", "ts": ..., "op": "insert", "pos": p, "text": "...", "cursor": n}
+  {"type": "edit", "ts": ..., "op": "delete", "pos": p, "count": n, "cursor": n}
+  {"type": "dropped", "ts": ..., "count": n}                     eventos descartados por lentitud
+ts es la hora de pared (time.time()) en segundos. Los eventos edit describen cada cambio del
+texto sobre el de hello: insertar "text" en la posición p, o borrar los count caracteres que
+empiezan en p. El texto completo solo viaja en hello, así publicar una edición no depende
+del largo del texto. Si hubo eventos descartados ("dropped") conviene reconectarse para
+recibir de nuevo el texto completo.
+
+El servidor corre en su propio hilo con un bucle asyncio; el bucle de frames solo encola.
+Cada cliente tiene una cola acotada: si no lee a tiempo se descartan los eventos más viejos,
+así un consumidor lento nunca frena la interfaz.
+
+Cliente de prueba:
+  python event_server.py [127.0.0.1:8765 | unix:/tmp/eyetyper.sock] [--types gaze,edit]
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import threading
+import time
+import config
+from document import TextDocument
+
+
+def parse_address(address):
+    """'unix:/ruta' -> ('unix', ruta); 'host:puerto' -> ('tcp', host, puerto)."""
+    if address.startswith("unix:"):
+        return ("unix", address[len("unix:"):])
+    host, _, port = address.rpartition(":")
+    return ("tcp", host or "127.0.0.1", int(port))
+
+
+class _Client:
+    def __init__(self, writer, queue_size, next_sequence):
+        self.writer = writer
+        self.queue = collections.deque(maxlen=queue_size)  # (secuencia, datos); acotada: descarta el más viejo
+        self.next_sequence = next_sequence  # Secuencia esperada: un salto son eventos descartados
+        self.wakeup = asyncio.Event()
+
+
+class EventServer:
+    """
+    Publica eventos de la aplicación a los clientes conectados. publish() se llama desde el
+    hilo de la interfaz: serializa el evento una sola vez y lo añade, numerado, a la cola de cada
+    cliente. Los descartes se cuentan en el hilo del servidor por los saltos de numeración.
+    También escucha las ediciones del documento (record_insert / record_delete, como el diario)
+    y guarda su propia copia del texto para el saludo de los clientes nuevos.
+    """
+    def __init__(self, address=config.EVENT_SERVER_ADDRESS, queue_size=config.EVENT_SERVER_QUEUE_SIZE,
+                 gaze_decimation=config.EVENT_SERVER_GAZE_DECIMATION, text=""):
+        self.address = parse_address(address)
+        self.queue_size = queue_size
+        self.gaze_decimation = max(1, gaze_decimation)
+        self.clients = ()  # Tupla reemplazada completa al conectar/desconectar: se recorre sin bloqueos
+        self.loop = None
+        self.thread = None
+        self._server = None
+        self._error = None
+        self._gaze_counter = 0
+        self._sequence = 0  # Número del próximo evento publicado
+        # Copia del texto para el saludo. El candado hace que un cliente nuevo reciba el texto
+        # y, después, exactamente los eventos posteriores a él, numerados desde _sequence
+        self._text = TextDocument(text)
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Arranca el hilo del servidor; lanza OSError si no se puede abrir la dirección."""
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(ready,), daemon=True, name="EventServer")
+        self.thread.start()
+        ready.wait()
+        if self._error:
+            raise self._error
+        print(f"Servidor de eventos escuchando en {self.describe_address()}")
+
+    def describe_address(self):
+        return f"unix:{self.address[1]}" if self.address[0] == "unix" else f"{self.address[1]}:{self.address[2]}"
+
+    def _run(self, ready):
+        self.loop = asyncio.new_event_loop()
+        try:
+            if self.address[0] == "unix":
+                if os.path.exists(self.address[1]):
+                    os.unlink(self.address[1])  # Socket de una ejecución anterior
+                self._server = self.loop.run_until_complete(
+                    asyncio.start_unix_server(self._handle_client, path=self.address[1]))
+            else:
+                self._server = self.loop.run_until_complete(
+                    asyncio.start_server(self._handle_client, self.address[1], self.address[2]))
+        except OSError as e:
+            self._error = e
+            self.loop.close()
+            ready.set()
+            return
+        ready.set()
+        self.loop.run_forever()
+        self._server.close()
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()  # Cada cliente cierra su conexión al cancelarse
+        self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self.loop.close()
+        if self.address[0] == "unix" and os.path.exists(self.address[1]):
+            os.unlink(self.address[1])
+
+    async def _handle_client(self, reader, writer):
+        with self._lock:
+            client = _Client(writer, self.queue_size, self._sequence)
+            # Directo al transporte, no a la cola: el saludo nunca se descarta
+            writer.write(self._encode({"type": "hello", "text": str(self._text), "cursor": self._text.cursor}))
+            self.clients = self.clients + (client,)
+        try:
+            while True:
+                while client.queue:
+                    sequence, data = client.queue.popleft()
+                    if sequence > client.next_sequence:
+                        writer.write(self._encode({"type": "dropped", "count": sequence - client.next_sequence}))
+                    client.next_sequence = sequence + 1
+                    writer.write(data)
+                await writer.drain()
+                client.wakeup.clear()
+                if not client.queue:
+                    await client.wakeup.wait()
+        except (ConnectionError, OSError):
+            pass
+        except asyncio.CancelledError:
+            pass  # Cierre del servidor: terminar sin propagar (si no, asyncio imprime la traza)
+        finally:
+            self.clients = tuple(c for c in self.clients if c is not client)
+            writer.close()
+
+    def _wake_clients(self):
+        for client in self.clients:
+            client.wakeup.set()
+
+    @staticmethod
+    def _encode(event):
+        event["ts"] = time.time()
+        return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def publish(self, event):
+        """Encola un evento (dict) para todos los clientes. No bloquea; sin clientes no hace nada."""
+        with self._lock:
+            self._publish(event)
+
+    def _publish(self, event):
+        # Con self._lock tomado
+        clients = self.clients
+        sequence = self._sequence
+        self._sequence += 1
+        if not clients or self.loop is None:
+            return
+        item = (sequence, self._encode(event))
+        for client in clients:
+            client.queue.append(item)
+        self.loop.call_soon_threadsafe(self._wake_clients)
+
+    def publish_gaze(self, x, y, state, target=None):
+        """Publica una de cada gaze_decimation muestras de mirada."""
+        self._gaze_counter += 1
+        if self._gaze_counter % self.gaze_decimation:
+            return
+        self.publish({"type": "gaze", "x": x, "y": y, "state": state, "target": target})
+
+    def record_insert(self, position, text):
+        with self._lock:
+            self._text.move_cursor(position)
+            self._text.insert(text)
+            self._publish({"type": "edit", "op": "insert", "pos": position, "text": text, "cursor": self._text.cursor})
+
+    def record_delete(self, position, count):
+        """Como en el diario, position es el final del tramo borrado."""
+        with self._lock:
+            self._text.move_cursor(position)
+            self._text.delete_before(count)
+            self._publish({"type": "edit", "op": "delete", "pos": position - count, "count": count, "cursor": self._text.cursor})
+
+    def stop(self):
+        if self.loop is not None and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=2)
+
+
+async def run_client(address, types=None):
+    """Cliente mínimo: imprime los eventos recibidos (opcionalmente filtrados por tipo)."""
+    kind = parse_address(address)
+    if kind[0] == "unix":
+        reader, writer = await asyncio.open_unix_connection(kind[1])
+    else:
+        reader, writer = await asyncio.open_connection(kind[1], kind[2])
+    print(f"Conectado a {address}")
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            event = json.loads(line)
+            if types is None or event["type"] in types:
+                print(json.dumps(event, ensure_ascii=False))
+    finally:
+        writer.close()
+    print("Conexión cerrada por el servidor.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cliente de prueba del servidor de eventos de EyeTyper.")
+    parser.add_argument("address", nargs="?", default=config.EVENT_SERVER_ADDRESS,
+                        help="host:puerto o unix:/ruta/al/socket")
+    parser.add_argument("--types", help="Tipos de evento a mostrar separados por comas (p. ej. selection,edit)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_client(args.address, set(args.types.split(",")) if args.types else None))
+    except (ConnectionError, FileNotFoundError) as e:
+        print(f"No se pudo conectar a {args.address}: {e}")
+    except KeyboardInterrupt:
+        pass
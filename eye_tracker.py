@@ -4,45 +4,99 @@ import mediapipe as mp
 import numpy as np
 import config
 import time
+from collections import namedtuple
+from blink_detector import BlinkDetector
 
 # --- Constantes ---
 EYE_LANDMARK_IDS_TO_DRAW = [362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398, 474, 475, 476, 477, 33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246, 469, 470, 471, 472]
 EAR_LEFT_EYE_LANDMARKS_IDS = {"P1": 362, "P4": 263, "P2": 386, "P6": 374, "P3": 385, "P5": 373}
+EAR_RIGHT_EYE_LANDMARKS_IDS = {"P1": 33, "P4": 133, "P2": 159, "P6": 145, "P3": 158, "P5": 153}
 LEFT_IRIS_LANDMARKS_IDS = [474, 475, 476, 477]
 LEFT_EYE_LEFT_CORNER_ID, LEFT_EYE_RIGHT_CORNER_ID = 362, 263
 LEFT_EYE_TOP_LID_ID, LEFT_EYE_BOTTOM_LID_ID = 386, 374
+RIGHT_IRIS_LANDMARKS_IDS = [469, 470, 471, 472]
+RIGHT_EYE_LEFT_CORNER_ID, RIGHT_EYE_RIGHT_CORNER_ID = 33, 133
+RIGHT_EYE_TOP_LID_ID, RIGHT_EYE_BOTTOM_LID_ID = 159, 145
+# Puntos simétricos de ambos ojos (de la esquina exterior a la interior), para espejar landmarks
+LEFT_EYE_MIRROR_IDS = [263, 249, 390, 373, 374, 380, 381, 382, 362, 466, 388, 387, 386, 385, 384, 398, 473, 474, 475, 476, 477]
+RIGHT_EYE_MIRROR_IDS = [33, 7, 163, 144, 145, 153, 154, 155, 133, 246, 161, 160, 159, 158, 157, 173, 468, 469, 470, 471, 472]
+MIRROR_LANDMARK_IDS = {**dict(zip(LEFT_EYE_MIRROR_IDS, RIGHT_EYE_MIRROR_IDS)), **dict(zip(RIGHT_EYE_MIRROR_IDS, LEFT_EYE_MIRROR_IDS))}
+
+LandmarkPoint = namedtuple("LandmarkPoint", ["x", "y", "z"])
+
+
+class MirroredFaceLandmarks:
+    """
+    Landmarks de FaceMesh sobre el frame sin espejar, vistos como si el frame se hubiera
+    espejado antes (como hacía cv2.flip): x -> 1 - x y se intercambian los índices de los ojos
+    izquierdo y derecho, igual que los etiquetaría FaceMesh en la imagen espejada.
+    Así se evita espejar la imagen completa en cada frame.
+    """
+    __slots__ = ("_landmarks",)
+
+    def __init__(self, face_landmarks):
+        self._landmarks = face_landmarks.landmark
+
+    @property
+    def landmark(self):
+        return self
+
+    def __len__(self):
+        return len(self._landmarks)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        point = self._landmarks[MIRROR_LANDMARK_IDS.get(index, index)]
+        return LandmarkPoint(1.0 - point.x, point.y, point.z)
+
 
 class EyeTracker:
-    def __init__(self):
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1, refine_landmarks=True,
-            min_detection_confidence=0.5, min_tracking_confidence=0.5)
-        
-        try:
-            self.webcam = cv2.VideoCapture(0)
-            if not self.webcam.isOpened(): self.webcam = cv2.VideoCapture(1)
-            if not self.webcam.isOpened(): self.webcam = cv2.VideoCapture(-1)
-            if not self.webcam.isOpened(): raise IOError("No se puede abrir la webcam.")
-        except Exception as e:
-            raise IOError(f"Excepción al abrir la webcam: {e}")
-
-        self.frame = None; self.frame_shape = None
+    def __init__(self, video_source=None, capture=True):
+        # video_source: None = webcam (0, 1, -1); ruta o índice = esa fuente (p. ej. un video grabado)
+        # capture=False: sin cámara ni FaceMesh, solo se alimenta con process_landmarks (reproducción offline)
+        self.webcam = None
+        if capture:
+            self.mp_face_mesh = mp.solutions.face_mesh
+            self.face_mesh = self.mp_face_mesh.FaceMesh(
+                max_num_faces=1, refine_landmarks=True,
+                min_detection_confidence=0.5, min_tracking_confidence=0.5)
+
+            try:
+                if video_source is not None:
+                    self.webcam = cv2.VideoCapture(video_source)
+                    if not self.webcam.isOpened(): raise IOError(f"No se puede abrir la fuente de video '{video_source}'.")
+                else:
+                    self.webcam = cv2.VideoCapture(0)
+                    if not self.webcam.isOpened(): self.webcam = cv2.VideoCapture(1)
+                    if not self.webcam.isOpened(): self.webcam = cv2.VideoCapture(-1)
+                    if not self.webcam.isOpened(): raise IOError("No se puede abrir la webcam.")
+            except Exception as e:
+                raise IOError(f"Excepción al abrir la webcam: {e}")
+
+        self.frame = None; self.frame_shape = None  # Último frame BGR de la cámara, sin espejar
+        # Buffers reutilizados en cada frame (se recrean solo si cambia la resolución)
+        self._capture_buffer = None; self._rgb_buffer = None; self._preview_buffer = None
         self.smoothed_gaze_coordinates = None; self.raw_gaze_ratio = None
         self.current_face_landmarks = None; self.last_valid_gaze_ratio = None
         
-        self.ear_threshold = 0.24
-        self.current_ear = 0
-        self.blinking_state = "OPEN" 
+        self.smoothing_factor = config.GAZE_SMOOTHING_FACTOR
+        self.blink_detector = BlinkDetector()
+        self.current_ear = 0; self.current_ear_left = 0; self.current_ear_right = 0
+        # Estado de la fusión de ambos ojos
+        self.previous_eye_ratios = {}
+        self.eye_instability = {"left": 0.0, "right": 0.0}
+        self.eye_weights = {"left": 0.0, "right": 0.0}
+        self.eye_offset = (0.0, 0.0)
 
-    def _calculate_ear(self, landmarks):
+    def _calculate_ear(self, landmarks, ids=EAR_LEFT_EYE_LANDMARKS_IDS):
         try:
-            p1 = np.array([landmarks[EAR_LEFT_EYE_LANDMARKS_IDS["P1"]].x, landmarks[EAR_LEFT_EYE_LANDMARKS_IDS["P1"]].y])
-            p4 = np.array([landmarks[EAR_LEFT_EYE_LANDMARKS_IDS["P4"]].x, landmarks[EAR_LEFT_EYE_LANDMARKS_IDS["P4"]].y])
-            p2 = np.array([landmarks[EAR_LEFT_EYE_LANDMARKS_IDS["P2"]].x, landmarks[EAR_LEFT_EYE_LANDMARKS_IDS["P2"]].y])
-            p6 = np.array([landmarks[EAR_LEFT_EYE_LANDMARKS_IDS["P6"]].x, landmarks[EAR_LEFT_EYE_LANDMARKS_IDS["P6"]].y])
-            p3 = np.array([landmarks[EAR_LEFT_EYE_LANDMARKS_IDS["P3"]].x, landmarks[EAR_LEFT_EYE_LANDMARKS_IDS["P3"]].y])
-            p5 = np.array([landmarks[EAR_LEFT_EYE_LANDMARKS_IDS["P5"]].x, landmarks[EAR_LEFT_EYE_LANDMARKS_IDS["P5"]].y])
+            p1 = np.array([landmarks[ids["P1"]].x, landmarks[ids["P1"]].y])
+            p4 = np.array([landmarks[ids["P4"]].x, landmarks[ids["P4"]].y])
+            p2 = np.array([landmarks[ids["P2"]].x, landmarks[ids["P2"]].y])
+            p6 = np.array([landmarks[ids["P6"]].x, landmarks[ids["P6"]].y])
+            p3 = np.array([landmarks[ids["P3"]].x, landmarks[ids["P3"]].y])
+            p5 = np.array([landmarks[ids["P5"]].x, landmarks[ids["P5"]].y])
             dist_v1 = np.linalg.norm(p2 - p6); dist_v2 = np.linalg.norm(p3 - p5)
             dist_h = np.linalg.norm(p1 - p4)
             if dist_h == 0: return 0.0
@@ -50,60 +104,115 @@ class EyeTracker:
         except (IndexError, AttributeError): return 0.0
 
     def is_blinking(self):
-        blink_event = False
-        is_eye_closed = self.current_ear < self.ear_threshold and self.current_ear > 0
-        if is_eye_closed:
-            if self.blinking_state == "OPEN":
-                blink_event = True
-            self.blinking_state = "CLOSED"
-        else:
-            self.blinking_state = "OPEN"
-        return blink_event
+        # True solo en el frame en que termina un parpadeo válido (voluntario, si así se configura)
+        event = self.blink_detector.blink_event
+        if event is None: return False
+        return event.deliberate or not config.BLINK_CLICK_REQUIRES_DELIBERATE
 
     def update_frame(self):
-        ret, bgr_frame = self.webcam.read()
+        # Sin copias por frame: se lee y se convierte a RGB sobre buffers ya reservados,
+        # y en lugar de espejar la imagen se espejan los landmarks
+        ret, bgr_frame = self.webcam.read(self._capture_buffer)
         if not ret: self.frame = None; return False
-        self.frame = cv2.flip(bgr_frame, 1); self.frame_shape = self.frame.shape
-        rgb_frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(rgb_frame)
-        
-        self.current_face_landmarks = None; self.current_ear = 0
-        if results.multi_face_landmarks:
-            for face_landmarks in results.multi_face_landmarks:
-                self.current_face_landmarks = face_landmarks
-                self.current_ear = self._calculate_ear(face_landmarks.landmark)
-                break
-        
-        # Lógica de congelación reforzada
+        self._capture_buffer = bgr_frame
+        if self._rgb_buffer is None or self._rgb_buffer.shape != bgr_frame.shape:
+            self._rgb_buffer = np.empty_like(bgr_frame)
+        cv2.cvtColor(bgr_frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buffer)
+        self.frame = bgr_frame; self.frame_shape = bgr_frame.shape
+        results = self.face_mesh.process(self._rgb_buffer)
+        face_landmarks = MirroredFaceLandmarks(results.multi_face_landmarks[0]) if results.multi_face_landmarks else None
+        self.process_landmarks(face_landmarks)
+        return True
+
+    def process_landmarks(self, face_landmarks, timestamp_ms=None):
+        """Actualiza EAR, parpadeo y ratios de mirada a partir de los landmarks de un frame (o None si no hay cara)."""
+        if timestamp_ms is None: timestamp_ms = time.time() * 1000
+        self.current_face_landmarks = face_landmarks
+        self.current_ear = 0; self.current_ear_left = 0; self.current_ear_right = 0
+        if face_landmarks is not None:
+            self.current_ear_left = self._calculate_ear(face_landmarks.landmark, EAR_LEFT_EYE_LANDMARKS_IDS)
+            self.current_ear_right = self._calculate_ear(face_landmarks.landmark, EAR_RIGHT_EYE_LANDMARKS_IDS)
+            valid_ears = [e for e in (self.current_ear_left, self.current_ear_right) if e > 0]
+            self.current_ear = sum(valid_ears) / len(valid_ears) if valid_ears else 0
+        self.blink_detector.update(self.current_ear_left, self.current_ear_right, timestamp_ms)
+
+        # Se congela la mirada solo si ningún ojo tiene peso (ambos cerrados u ocluidos): con un
+        # ojo cerrado el detector puede marcar cierre por el EAR medio, pero el otro sigue mirando
         ratios = self._calculate_gaze_ratios_from_landmarks(self.current_face_landmarks)
-        if ratios and self.current_ear > self.ear_threshold:
+        if ratios and self.current_ear > 0:
             self.raw_gaze_ratio = ratios
             self.last_valid_gaze_ratio = ratios
         else:
             self.raw_gaze_ratio = self.last_valid_gaze_ratio
-            
-        return True
 
-    def _calculate_gaze_ratios_from_landmarks(self, face_landmarks):
-        if face_landmarks is None: return None
-        landmarks = face_landmarks.landmark
+    def _calculate_eye_ratio(self, landmarks, iris_ids, left_corner_id, right_corner_id, top_lid_id, bottom_lid_id):
+        # Posición del iris dentro del ojo: (0, 0) = esquina izquierda / párpado superior
         try:
-            left_iris_points = [landmarks[i] for i in LEFT_IRIS_LANDMARKS_IDS]
-            left_pupil_center_x = sum(p.x for p in left_iris_points) / len(left_iris_points)
-            left_pupil_center_y = sum(p.y for p in left_iris_points) / len(left_iris_points)
-            l_eye_left_corner_x = landmarks[LEFT_EYE_LEFT_CORNER_ID].x; l_eye_right_corner_x = landmarks[LEFT_EYE_RIGHT_CORNER_ID].x
-            l_eye_top_lid_y = landmarks[LEFT_EYE_TOP_LID_ID].y; l_eye_bottom_lid_y = landmarks[LEFT_EYE_BOTTOM_LID_ID].y
-            left_eye_width = abs(l_eye_right_corner_x - l_eye_left_corner_x)
-            left_eye_height = abs(l_eye_bottom_lid_y - l_eye_top_lid_y)
-            if left_eye_width < 1e-6 or left_eye_height < 1e-6: return None
-            h_ratio_left = (left_pupil_center_x - l_eye_left_corner_x) / left_eye_width
-            v_ratio_left = (left_pupil_center_y - l_eye_top_lid_y) / left_eye_height
-            return (np.clip(h_ratio_left, 0.0, 1.0), np.clip(v_ratio_left, 0.0, 1.0))
+            iris_points = [landmarks[i] for i in iris_ids]
+            pupil_center_x = sum(p.x for p in iris_points) / len(iris_points)
+            pupil_center_y = sum(p.y for p in iris_points) / len(iris_points)
+            eye_left_corner_x = landmarks[left_corner_id].x; eye_right_corner_x = landmarks[right_corner_id].x
+            eye_top_lid_y = landmarks[top_lid_id].y; eye_bottom_lid_y = landmarks[bottom_lid_id].y
+            eye_width = abs(eye_right_corner_x - eye_left_corner_x)
+            eye_height = abs(eye_bottom_lid_y - eye_top_lid_y)
+            if eye_width < 1e-6 or eye_height < 1e-6: return None
+            h_ratio = (pupil_center_x - eye_left_corner_x) / eye_width
+            v_ratio = (pupil_center_y - eye_top_lid_y) / eye_height
+            return (np.clip(h_ratio, 0.0, 1.0), np.clip(v_ratio, 0.0, 1.0))
         except (IndexError, AttributeError, ZeroDivisionError): return None
-        
+
+    def _update_eye_stability(self, eye, ratio):
+        # Media exponencial del salto cuadrático entre frames: alta = landmarks inestables
+        previous = self.previous_eye_ratios.get(eye)
+        self.previous_eye_ratios[eye] = ratio
+        if ratio is None or previous is None: return
+        jump = (ratio[0] - previous[0]) ** 2 + (ratio[1] - previous[1]) ** 2
+        alpha = config.GAZE_FUSION_STABILITY_ALPHA
+        self.eye_instability[eye] = alpha * jump + (1 - alpha) * self.eye_instability[eye]
+
+    def _calculate_gaze_ratios_from_landmarks(self, face_landmarks):
+        """
+        Ratios de mirada fusionando ambos ojos. Cada ojo pesa según su apertura y la estabilidad
+        de sus landmarks; si uno está ocluido o a medio parpadeo, el otro toma el control.
+        El resultado se expresa en la escala del ojo izquierdo (se corrige la diferencia media entre ojos).
+        """
+        if face_landmarks is None:
+            self.previous_eye_ratios = {}
+            return None
+        landmarks = face_landmarks.landmark
+        left = self._calculate_eye_ratio(landmarks, LEFT_IRIS_LANDMARKS_IDS, LEFT_EYE_LEFT_CORNER_ID, LEFT_EYE_RIGHT_CORNER_ID,
+                                         LEFT_EYE_TOP_LID_ID, LEFT_EYE_BOTTOM_LID_ID)
+        right = self._calculate_eye_ratio(landmarks, RIGHT_IRIS_LANDMARKS_IDS, RIGHT_EYE_LEFT_CORNER_ID, RIGHT_EYE_RIGHT_CORNER_ID,
+                                          RIGHT_EYE_TOP_LID_ID, RIGHT_EYE_BOTTOM_LID_ID)
+        self._update_eye_stability("left", left); self._update_eye_stability("right", right)
+
+        weights = {}
+        for eye, ratio, ear in (("left", left, self.current_ear_left), ("right", right, self.current_ear_right)):
+            openness = self.blink_detector.eye_openness(eye, ear) if ratio is not None else 0.0
+            weights[eye] = openness * openness / (config.GAZE_FUSION_MIN_VARIANCE + self.eye_instability[eye])
+        self.eye_weights = weights
+
+        if left is not None and right is not None and weights["left"] > 0 and weights["right"] > 0:
+            # Diferencia media entre ojos para que el cambio de un ojo a otro no haga saltar el puntero
+            a = config.GAZE_FUSION_OFFSET_ALPHA
+            self.eye_offset = (a * (left[0] - right[0]) + (1 - a) * self.eye_offset[0],
+                               a * (left[1] - right[1]) + (1 - a) * self.eye_offset[1])
+        total = weights["left"] + weights["right"]
+        if total <= 0: return None
+        h_ratio = v_ratio = 0.0
+        if weights["left"] > 0:
+            h_ratio += weights["left"] * left[0]; v_ratio += weights["left"] * left[1]
+        if weights["right"] > 0:
+            h_ratio += weights["right"] * (right[0] + self.eye_offset[0]); v_ratio += weights["right"] * (right[1] + self.eye_offset[1])
+        return (np.clip(h_ratio / total, 0.0, 1.0), np.clip(v_ratio / total, 0.0, 1.0))
+
     def get_annotated_frame(self):
+        # Vista previa espejada (solo se llama si se muestra la cámara de depuración). El espejo
+        # se escribe en un buffer reservado, que sirve a la vez de copia para dibujar encima.
         if self.frame is None: return None
-        annotated_frame = self.frame.copy()
+        if self._preview_buffer is None or self._preview_buffer.shape != self.frame.shape:
+            self._preview_buffer = np.empty_like(self.frame)
+        annotated_frame = cv2.flip(self.frame, 1, dst=self._preview_buffer)
         if config.SHOW_DEBUG_FACE_MESH and self.current_face_landmarks:
             landmarks = self.current_face_landmarks.landmark
             (h, w, _) = self.frame.shape
@@ -117,7 +226,7 @@ class EyeTracker:
         if sxm is not None and sym is not None:
             if self.smoothed_gaze_coordinates is None: self.smoothed_gaze_coordinates = (sxm, sym)
             else:
-                alpha = config.GAZE_SMOOTHING_FACTOR
+                alpha = self.smoothing_factor
                 sx = alpha * sxm + (1 - alpha) * self.smoothed_gaze_coordinates[0]
                 sy = alpha * sym + (1 - alpha) * self.smoothed_gaze_coordinates[1]
                 self.smoothed_gaze_coordinates = (int(sx), int(sy))
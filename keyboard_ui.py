@@ -1,4 +1,5 @@
 # keyboard_ui.py
+import time
 import pygame
 import config
 
@@ -12,13 +13,20 @@ class Key:
         self.is_special = is_special
         self.is_hovered = False
         if self.char == ' ': self.display_char = "ESPACIO"
+        # Modo predictivo: probabilidad de ser la siguiente tecla y crecimiento del área de selección
+        self.probability = 0.0
+        self.grow_px = 0
+        self.hit_rect = self.rect.copy()
 
     def draw(self, screen):
         color = config.HIGHLIGHT_COLOR if self.is_hovered else config.GRAY
-        pygame.draw.rect(screen, color, self.rect, border_radius=config.KEY_BORDER_RADIUS)
-        pygame.draw.rect(screen, config.BLACK, self.rect, 2, border_radius=config.KEY_BORDER_RADIUS)
+        draw_rect = self.rect
+        if config.PREDICTIVE_KEY_VISUALS and self.grow_px:
+            draw_rect = self.rect.inflate(self.grow_px, self.grow_px)
+        pygame.draw.rect(screen, color, draw_rect, border_radius=config.KEY_BORDER_RADIUS)
+        pygame.draw.rect(screen, config.BLACK, draw_rect, 2, border_radius=config.KEY_BORDER_RADIUS)
         text_surface = self.font.render(self.display_char, True, config.BLACK)
-        text_rect = text_surface.get_rect(center=self.rect.center)
+        text_rect = text_surface.get_rect(center=draw_rect.center)
         screen.blit(text_surface, text_rect)
 
     def is_gazed(self, gaze_pos):
@@ -42,6 +50,12 @@ class Keyboard:
         self._setup_keys()
         self.bounding_rect = self._calculate_bounding_rect() # Bounding box solo del teclado físico
 
+        # Índice espacial de las áreas de selección (celdas del tamaño de una tecla)
+        self.hit_cell_size = config.KEY_WIDTH + config.KEY_MARGIN
+        self.hit_grid = {}
+        for key in self.keys: self._index_key(key)
+        self.last_layout_update_ms = 0.0
+
     def _get_key_width(self, char_code):
         # ... (Sin cambios) ...
         if char_code in ['BACKSPACE', 'ENTER', 'CAPS', 'SHIFT']: return config.KEY_WIDTH * 2.5
@@ -85,32 +99,84 @@ class Keyboard:
     def get_bounding_rect(self): # Devuelve el rect solo de las teclas
         return self.bounding_rect
 
-    def handle_input(self, key_obj, current_text):
-        # ... (Sin cambios) ...
+    def get_key_centers(self): # Centro de cada tecla de letra, para medir distancias entre teclas
+        return {key.char.lower(): key.rect.center for key in self.keys if not key.is_special and len(key.char) == 1}
+
+    def handle_input(self, key_obj, document):
+        # Aplica la tecla directamente sobre el documento (TextDocument)
         key_char_action = key_obj.char
-        if key_char_action == 'Borrar': return current_text[:-1]
-        elif key_char_action == 'Enter': return current_text + '\n'
-        elif key_char_action == 'Mayús': self.caps_lock_on = not self.caps_lock_on; return current_text
-        elif key_char_action == 'Shift': self.caps_lock_on = not self.caps_lock_on; return current_text
-        elif key_char_action == ' ': return current_text + ' '
+        if key_char_action == 'Borrar': document.delete_before(1)
+        elif key_char_action == 'Enter': document.insert('\n')
+        elif key_char_action == 'Mayús': self.caps_lock_on = not self.caps_lock_on
+        elif key_char_action == 'Shift': self.caps_lock_on = not self.caps_lock_on
+        elif key_char_action == ' ': document.insert(' ')
         else:
             char_to_add = key_char_action
             if len(char_to_add) == 1:
                 if self.caps_lock_on: char_to_add = char_to_add.upper()
                 else: char_to_add = char_to_add.lower()
-            return current_text + char_to_add
+            document.insert(char_to_add)
+
+    def _hit_cells(self, rect):
+        size = self.hit_cell_size
+        for cx in range(int(rect.left // size), int((rect.right - 1) // size) + 1):
+            for cy in range(int(rect.top // size), int((rect.bottom - 1) // size) + 1):
+                yield (cx, cy)
+
+    def _index_key(self, key):
+        for cell in self._hit_cells(key.hit_rect): self.hit_grid.setdefault(cell, []).append(key)
+
+    def _unindex_key(self, key):
+        for cell in self._hit_cells(key.hit_rect): self.hit_grid[cell].remove(key)
+
+    def set_key_probabilities(self, probabilities):
+        """
+        Modo predictivo: agranda el área de selección de las letras probables.
+        probabilities: {carácter: probabilidad} de la siguiente pulsación. Solo se reindexan las
+        teclas cuyo tamaño cambia, así la actualización tras cada pulsación es incremental.
+        """
+        start = time.perf_counter()
+        max_p = max(probabilities.values(), default=0.0)
+        for key in self.keys:
+            if key.is_special and key.char != ' ': continue
+            p = probabilities.get(key.char.lower(), 0.0)
+            grow = 0
+            if max_p > 0 and p >= config.PREDICTIVE_MIN_PROBABILITY:
+                grow = int(round(config.PREDICTIVE_MAX_GROW_PX * p / max_p))
+            key.probability = p
+            if grow != key.grow_px:
+                self._unindex_key(key)
+                key.grow_px = grow
+                key.hit_rect = key.rect.inflate(2 * grow, 2 * grow)
+                self._index_key(key)
+        self.last_layout_update_ms = (time.perf_counter() - start) * 1000
 
     def get_key_at_gaze(self, gaze_pos):
-        # ... (Sin cambios) ...
         if not gaze_pos: return None
-        for key in self.keys:
-            if key.is_gazed(gaze_pos): return key
-        return None
+        if not config.PREDICTIVE_KEY_SIZING:
+            for key in self.keys:
+                if key.is_gazed(gaze_pos): return key
+            return None
+        # Entre las áreas que contienen la mirada gana la de menor distancia al borde de su tecla
+        # descontando su crecimiento; dentro de la propia tecla la distancia es 0
+        size = self.hit_cell_size
+        best_key = None; best_score = None
+        for key in self.hit_grid.get((int(gaze_pos[0] // size), int(gaze_pos[1] // size)), ()):
+            if not key.hit_rect.collidepoint(gaze_pos): continue
+            dx = max(key.rect.left - gaze_pos[0], 0, gaze_pos[0] - key.rect.right + 1)
+            dy = max(key.rect.top - gaze_pos[1], 0, gaze_pos[1] - key.rect.bottom + 1)
+            score = (dx * dx + dy * dy) ** 0.5 - key.grow_px
+            if best_score is None or score < best_score or (score == best_score and key.rect.collidepoint(gaze_pos)):
+                best_key = key; best_score = score
+        return best_key
 
     def update_hover_state(self, gazed_key_obj):
         # ... (Sin cambios) ...
         for key in self.keys: key.is_hovered = (key == gazed_key_obj)
 
     def draw(self, screen):
-        # ... (Sin cambios) ...
-        for key in self.keys: key.draw(screen)
\ No newline at end of file
+        if config.PREDICTIVE_KEY_SIZING and config.PREDICTIVE_KEY_VISUALS:
+            # Las teclas agrandadas se dibujan al final para quedar por encima
+            for key in sorted(self.keys, key=lambda k: k.grow_px): key.draw(screen)
+        else:
+            for key in self.keys: key.draw(screen)
\ No newline at end of file
@@ -0,0 +1,252 @@
+# lexicon.py
+"""
+Léxico precompilado en formato binario y abierto con mmap.
+
+Formato (.lex, enteros en el orden de bytes nativo indicado en la cabecera):
+  cabecera  -> magic, versión, orden de bytes, nº de palabras, mtime_ns y tamaño del texto fuente
+  offsets   -> uint32[n + 1], inicio de cada palabra dentro del blob
+  freqs     -> uint32[n], frecuencia de cada palabra (0 si el texto no la trae)
+  índice    -> uint32[257], rango de palabras por primer byte UTF-8
+  blob      -> palabras UTF-8 concatenadas y ordenadas por bytes
+
+Uso como paso de compilación:
+  python lexicon.py palabras_es.txt [-o palabras_es.lex]
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+LEXICON_MAGIC = b"EYELEX\x00\x00"
+LEXICON_VERSION = 1
+# magic, versión, orden de bytes (1 = little), nº palabras, mtime_ns fuente, tamaño fuente
+HEADER_FORMAT = "<8sHHIqq"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+INDEX_SIZE = 257
+NATIVE_BYTEORDER = 1 if sys.byteorder == "little" else 0
+
+
+def compiled_path_for(source_path):
+    return os.path.splitext(source_path)[0] + ".lex"
+
+
+def user_cache_path_for(source_path):
+    """
+    Alternativa cuando no se puede escribir junto al texto (instalación de solo lectura):
+    $XDG_CACHE_HOME/eyetyper (o ~/.cache/eyetyper), con un hash de la ruta para no mezclar fuentes.
+    """
+    cache_dir = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "eyetyper")
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    digest = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()[:8]
+    return os.path.join(cache_dir, f"{stem}-{digest}.lex")
+
+
+def read_word_list(source_path):
+    """
+    Lee el texto fuente: una palabra por línea, opcionalmente seguida de su frecuencia.
+    Aplica el mismo filtro que las sugerencias (minúsculas, solo letras, más de un carácter).
+    """
+    words = {}
+    with open(source_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            word = parts[0].strip().lower()
+            if len(word) <= 1 or not word.isalpha():
+                continue
+            freq = 0
+            if len(parts) > 1:
+                try:
+                    freq = max(0, min(int(float(parts[1])), 0xFFFFFFFF))
+                except ValueError:
+                    pass
+            words[word] = max(freq, words.get(word, 0))
+    return words
+
+
+def build_lexicon(source_path, output_path=None):
+    """
+    Compila el texto fuente al formato binario. Escribe en un temporal y lo renombra,
+    así un lector nunca ve un archivo a medio escribir.
+    """
+    output_path = output_path or compiled_path_for(source_path)
+    stat = os.stat(source_path)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    words = read_word_list(source_path)
+    encoded = sorted((w.encode('utf-8'), freq) for w, freq in words.items())
+
+    offsets = array('I', [0])
+    freqs = array('I')
+    index = array('I', [0] * INDEX_SIZE)
+    blob = bytearray()
+    for i, (word_bytes, freq) in enumerate(encoded):
+        blob += word_bytes
+        offsets.append(len(blob))
+        freqs.append(freq)
+        index[word_bytes[0] + 1] = i + 1
+    for b in range(1, INDEX_SIZE):  # Rellenar primeros bytes sin palabras
+        index[b] = max(index[b], index[b - 1])
+
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(struct.pack(HEADER_FORMAT, LEXICON_MAGIC, LEXICON_VERSION, NATIVE_BYTEORDER,
+                            len(encoded), stat.st_mtime_ns, stat.st_size))
+        offsets.tofile(f); freqs.tofile(f); index.tofile(f)
+        f.write(blob)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def _read_header(path):
+    with open(path, 'rb') as f:
+        data = f.read(HEADER_SIZE)
+    if len(data) < HEADER_SIZE:
+        return None
+    return struct.unpack(HEADER_FORMAT, data)
+
+
+def is_up_to_date(source_path, compiled_path):
+    try:
+        header = _read_header(compiled_path)
+        stat = os.stat(source_path)
+    except OSError:
+        return False
+    if header is None:
+        return False
+    magic, version, byteorder, _, source_mtime_ns, source_size = header
+    return (magic == LEXICON_MAGIC and version == LEXICON_VERSION and byteorder == NATIVE_BYTEORDER and
+            source_mtime_ns == stat.st_mtime_ns and source_size == stat.st_size)
+
+
+class Lexicon:
+    """
+    Léxico compilado abierto con mmap. Se comporta como una secuencia ordenada de palabras
+    (len, índice, iteración) sin cargar ni decodificar el archivo completo.
+    """
+    def __init__(self, compiled_path):
+        self._file = open(compiled_path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, byteorder, count, _, _ = struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        if magic != LEXICON_MAGIC or version != LEXICON_VERSION or byteorder != NATIVE_BYTEORDER:
+            self.close()
+            raise ValueError(f"Léxico compilado no válido: {compiled_path}")
+        self.count = count
+        view = memoryview(self._mmap)
+        pos = HEADER_SIZE
+        self._offsets = view[pos:pos + 4 * (count + 1)].cast('I'); pos += 4 * (count + 1)
+        self._freqs = view[pos:pos + 4 * count].cast('I'); pos += 4 * count
+        self._index = view[pos:pos + 4 * INDEX_SIZE].cast('I'); pos += 4 * INDEX_SIZE
+        self._blob_start = pos
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0: i += self.count
+        if not 0 <= i < self.count: raise IndexError(i)
+        return self.word_bytes(i).decode('utf-8')
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def word_bytes(self, i):
+        return self._mmap[self._blob_start + self._offsets[i]:self._blob_start + self._offsets[i + 1]]
+
+    def frequency(self, i):
+        return self._freqs[i]
+
+    def frequencies(self):
+        """Frecuencias de todas las palabras (vista uint32 de solo lectura sobre el mmap)."""
+        return self._freqs
+
+    def offsets(self):
+        """Inicio de cada palabra en el blob (n + 1 valores; la longitud de i es offsets[i + 1] - offsets[i])."""
+        return self._offsets
+
+    def prefix_range(self, prefix):
+        """Devuelve (lo, hi): las palabras [lo, hi) empiezan por prefix."""
+        prefix_bytes = prefix.encode('utf-8')
+        if not prefix_bytes:
+            return 0, self.count
+        lo, hi = self._index[prefix_bytes[0]], self._index[prefix_bytes[0] + 1]
+        n = len(prefix_bytes)
+        # Búsqueda binaria del primer elemento >= prefix y del primero que ya no lo comparte
+        a, b = lo, hi
+        while a < b:
+            mid = (a + b) // 2
+            if self.word_bytes(mid) < prefix_bytes: a = mid + 1
+            else: b = mid
+        start = a
+        b = hi
+        while a < b:
+            mid = (a + b) // 2
+            if self.word_bytes(mid)[:n] == prefix_bytes: a = mid + 1
+            else: b = mid
+        return start, a
+
+    def children(self, lo, hi, byte_depth):
+        """
+        Recorre el orden de las palabras como un trie implícito. Para el nodo [lo, hi) cuyas palabras
+        comparten sus primeros byte_depth bytes, devuelve (carácter, hijo_lo, hijo_hi) por cada
+        carácter siguiente distinto. La palabra que termina justo en el nodo (si existe) se omite.
+        """
+        result = []
+        i = lo
+        while i < hi:
+            wb = self.word_bytes(i)
+            if len(wb) <= byte_depth:
+                i += 1
+                continue
+            lead = wb[byte_depth]
+            char_len = 1 if lead < 0x80 else 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+            char_bytes = wb[byte_depth:byte_depth + char_len]
+            end = byte_depth + char_len
+            # Primer índice en (i, hi) que ya no comparte este carácter
+            a, b = i + 1, hi
+            while a < b:
+                mid = (a + b) // 2
+                if self.word_bytes(mid)[byte_depth:end] == char_bytes: a = mid + 1
+                else: b = mid
+            result.append((char_bytes.decode('utf-8'), i, a))
+            i = a
+        return result
+
+    def close(self):
+        for attr in ('_offsets', '_freqs', '_index'):
+            if hasattr(self, attr): getattr(self, attr).release()
+        self._mmap.close()
+        self._file.close()
+
+
+def load_lexicon(source_path):
+    """
+    Abre el léxico compilado de source_path, recompilándolo si falta o si el texto cambió.
+    Se compila junto al texto o, si ahí no se puede escribir, en la caché del usuario.
+    """
+    os.stat(source_path)  # FileNotFoundError si falta el texto
+    candidates = [compiled_path_for(source_path), user_cache_path_for(source_path)]
+    for compiled_path in candidates:
+        if is_up_to_date(source_path, compiled_path):
+            return Lexicon(compiled_path)
+    for i, compiled_path in enumerate(candidates):
+        try:
+            build_lexicon(source_path, compiled_path)
+        except OSError:
+            if i == len(candidates) - 1: raise
+            continue
+        print(f"Léxico compilado: {compiled_path}")
+        return Lexicon(compiled_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compila una lista de palabras (con frecuencias opcionales) a formato binario.")
+    parser.add_argument("source", help="Archivo de texto: una palabra por línea, opcionalmente 'palabra frecuencia'")
+    parser.add_argument("-o", "--output", help="Archivo .lex de salida (por defecto junto al texto)")
+    args = parser.parse_args()
+    path = build_lexicon(args.source, args.output)
+    print(f"{len(read_word_list(args.source))} palabras compiladas en {path}")
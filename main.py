@@ -1,11 +1,16 @@
 # main.py
 import pygame
 import cv2
+import numpy as np
 import config
 from eye_tracker import EyeTracker
 from calibration import Calibration
 from keyboard_ui import Key, Keyboard
 from word_suggester import WordSuggester
+from document import DocumentJournal, TextDocument
+from event_server import EventServer
+from profiler import ProfileCapture
+import argparse
 import time
 # Importa pyttsx3 para síntesis de voz (TTS)
 try:
@@ -57,10 +62,16 @@ class EyeTyperApp:
     """
     Clase principal que gestiona la lógica del teclado por mirada.
     """
-    def __init__(self):
+    def __init__(self, eye_tracker=None, autosave=True, event_server_address=None, audio=True, word_suggester=None):
+        # eye_tracker: rastreador ya creado (p. ej. uno simulado); por defecto se abre la webcam
+        # autosave: recuperar y registrar el texto en el diario de autoguardado
+        # event_server_address: publicar mirada, selecciones y texto en esta dirección (None = desactivado)
+        # audio: sonidos y voz (TTS); la reproducción offline y el simulador no los inicializan
+        # word_suggester: sugeridor ya cargado para reutilizarlo (por defecto se abre el léxico)
         # Inicialización de Pygame y recursos
         pygame.init()
-        pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+        if audio:
+            pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
         pygame.display.set_caption("EyeTyper - Escritura por Mirada (MediaPipe)")
         self.screen = pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
         self.clock = pygame.time.Clock()
@@ -69,16 +80,19 @@ class EyeTyperApp:
         self.font_info = pygame.font.Font(config.DEFAULT_FONT_NAME, config.FONT_SIZE_INFO)
         
         # Carga de sonidos para retroalimentación auditiva
-        try:
-            self.sound_letter = pygame.mixer.Sound("letra.wav")
-            self.sound_function = pygame.mixer.Sound("borrar.wav")
-        except pygame.error as e:
-            print(f"Error al cargar los sonidos: {e}")
-            self.sound_letter = None
-            self.sound_function = None
+        self.sound_letter = None
+        self.sound_function = None
+        if audio:
+            try:
+                self.sound_letter = pygame.mixer.Sound("letra.wav")
+                self.sound_function = pygame.mixer.Sound("borrar.wav")
+            except pygame.error as e:
+                print(f"Error al cargar los sonidos: {e}")
+                self.sound_letter = None
+                self.sound_function = None
 
         # Inicialización del motor de voz (TTS)
-        if pyttsx3:
+        if audio and pyttsx3:
             self.tts_engine = pyttsx3.init()
             voices = self.tts_engine.getProperty('voices')
             spanish_voice_id = next((voice.id for voice in voices if 'spanish' in voice.name.lower()), None)
@@ -90,14 +104,30 @@ class EyeTyperApp:
 
         # Inicialización del rastreador ocular
         try:
-            self.eye_tracker = EyeTracker()
+            self.eye_tracker = eye_tracker if eye_tracker is not None else EyeTracker()
         except IOError as e:
             self._show_error_and_exit(f"Error de Webcam/MediaPipe: {e}")
         
         # Inicialización del teclado, sugerencias y calibración
         self.keyboard = Keyboard(config.SCREEN_WIDTH)
-        self.word_suggester = WordSuggester()
-        self.typed_text = ""
+        self.word_suggester = word_suggester or WordSuggester(key_positions=self.keyboard.get_key_centers())
+        # Texto escrito: gap buffer con diario de autoguardado (se recupera tras un cierre inesperado)
+        self.journal = DocumentJournal() if autosave else None
+        self.document = self.journal.recover() if self.journal else TextDocument()
+        if len(self.document):
+            print(f"Recuperados {len(self.document)} caracteres del autoguardado.")
+        self._text_lines = []  # [(posición de inicio, texto)] de cada línea ya ajustada al ancho
+        self._text_lines_version = None
+        self._debug_thumb_surface = None  # Miniatura de la cámara (buffers reservados al primer uso)
+        self.event_server = None
+        if event_server_address:
+            try:
+                self.event_server = EventServer(event_server_address, text=str(self.document))
+                self.event_server.start()
+                self.document.listeners.append(self.event_server)  # Publica cada edición
+            except (OSError, ValueError) as e:
+                print(f"Advertencia: no se pudo iniciar el servidor de eventos en {event_server_address}: {e}")
+                self.event_server = None
         self.suggestion_boxes = []
         self.gazed_key_object = None
         self.gazed_suggestion_object = None
@@ -112,9 +142,11 @@ class EyeTyperApp:
         self.frozen_item = None
         self.frozen_position = None
         self.frozen_start_time = 0
-        self.DWELL_TO_FREEZE_MS = 800  # Tiempo de fijación para congelar selección
-        self.ACTION_WINDOW_MS = 1000   # Tiempo para realizar acción tras congelar
+        self.DWELL_TO_FREEZE_MS = config.DWELL_TO_FREEZE_MS  # Tiempo de fijación para congelar selección
+        self.ACTION_WINDOW_MS = config.ACTION_WINDOW_MS      # Tiempo para realizar acción tras congelar
         self.running = True
+        self.profile_capture = None  # Captura de perfil en curso (tecla P)
+        self.profile_writers = []
 
     def _speak_text(self, text_to_speak):
         """
@@ -128,11 +160,17 @@ class EyeTyperApp:
         except Exception as e:
             print(f"Error en el motor de TTS: {e}")
 
+    def _now_ms(self):
+        """
+        Tiempo actual en milisegundos (el simulador lo reemplaza por un reloj simulado).
+        """
+        return time.time() * 1000
+
     def _handle_state_and_selection(self):
         """
         Lógica de navegación y selección por mirada y parpadeo.
         """
-        now = time.time() * 1000
+        now = self._now_ms()
         gazed_item = self.gazed_suggestion_object if self.gazed_suggestion_object else self.gazed_key_object
         if self.app_state == "NAVIGATING":
             if gazed_item:
@@ -162,15 +200,20 @@ class EyeTyperApp:
         """
         if not selected_item:
             return
+        if self.event_server:
+            kind = "key" if isinstance(selected_item, Key) else "suggestion"
+            self.event_server.publish({"type": "selection", "kind": kind,
+                                       "value": selected_item.char if kind == "key" else selected_item.text})
 
         if isinstance(selected_item, Key):
             # Si es la tecla especial LEER, lee el texto en voz alta
             if hasattr(selected_item, 'char') and selected_item.char == 'LEER':
                 if self.sound_function:
                     self.sound_function.play()
-                if self.typed_text.strip():
+                text_to_speak = str(self.document)
+                if text_to_speak.strip():
                     # Usa un hilo para no congelar la interfaz mientras habla
-                    tts_thread = threading.Thread(target=self._speak_text, args=(self.typed_text,), daemon=True)
+                    tts_thread = threading.Thread(target=self._speak_text, args=(text_to_speak,), daemon=True)
                     tts_thread.start()
             else:
                 # Otras teclas: función o letra normal
@@ -181,29 +224,37 @@ class EyeTyperApp:
                     if self.sound_letter:
                         self.sound_letter.play()
                 # Actualiza el texto escrito
-                self.typed_text = self.keyboard.handle_input(selected_item, self.typed_text)
+                self.keyboard.handle_input(selected_item, self.document)
 
         elif isinstance(selected_item, SuggestionBox):
             # Si selecciona una sugerencia, reemplaza la palabra actual
             if self.sound_function:
                 self.sound_function.play()
-            words = self.typed_text.rstrip().split(' ')
-            if words and self.typed_text and not self.typed_text.endswith(' '):
-                words[-1] = selected_item.text
-                self.typed_text = " ".join(words) + " "
-            else:
-                self.typed_text += ("" if self.typed_text and (self.typed_text.endswith(" ") or self.typed_text.endswith("\n")) else " ") + selected_item.text + " "
+            self.document.replace_current_word(selected_item.text)
+            self.document.insert(" ")
         
         self._update_suggestions_display()
 
+    def _hit_test(self, gaze_coords):
+        """
+        Devuelve (tecla, sugerencia) bajo la mirada; como mucho una no es None. Las sugerencias
+        se prueban primero: en modo predictivo el área de las teclas de arriba puede crecer
+        sobre las cajas de sugerencias.
+        """
+        for s_box in self.suggestion_boxes:
+            if s_box.is_gazed(gaze_coords):
+                return None, s_box
+        return self.keyboard.get_key_at_gaze(gaze_coords), None
+
     def _update_gaze(self):
         """
         Actualiza la posición de la mirada y determina el elemento bajo la mirada.
         """
+        # Se leen frames también en FROZEN para que el detector de parpadeo siga viendo los ojos
+        self.eye_tracker.update_frame()
         if self.app_state == "FROZEN" and self.frozen_position:
             self.eye_tracker.set_gaze_coordinates(self.frozen_position[0], self.frozen_position[1])
         else:
-            self.eye_tracker.update_frame()
             raw_gaze = self.eye_tracker.get_raw_gaze_ratio()
             if raw_gaze:
                 screen_coords_mapped = self.calibration.map_gaze_to_screen(raw_gaze)
@@ -212,14 +263,12 @@ class EyeTyperApp:
                     screen_coords_mapped[1] if screen_coords_mapped else None
                 )
         gaze_coords = self.eye_tracker.get_gaze_screen_coordinates()
-        self.gazed_key_object = self.keyboard.get_key_at_gaze(gaze_coords)
-        self.gazed_suggestion_object = None
-        if not self.gazed_key_object:
-            for s_box in self.suggestion_boxes:
-                if s_box.is_gazed(gaze_coords):
-                    self.gazed_suggestion_object = s_box
-                    break
+        self.gazed_key_object, self.gazed_suggestion_object = self._hit_test(gaze_coords)
         self.keyboard.update_hover_state(self.gazed_key_object)
+        if self.event_server and gaze_coords:
+            target = self.gazed_key_object or self.gazed_suggestion_object
+            self.event_server.publish_gaze(float(gaze_coords[0]), float(gaze_coords[1]), self.app_state,
+                                           getattr(target, 'char', None) or getattr(target, 'text', None))
         for s_box in self.suggestion_boxes:
             s_box.is_hovered = (s_box == self.gazed_suggestion_object)
             
@@ -233,25 +282,44 @@ class EyeTyperApp:
             pygame.draw.circle(self.screen, color, gaze_coords, config.GAZE_POINTER_RADIUS, 0)
             pygame.draw.circle(self.screen, config.WHITE, gaze_coords, config.GAZE_POINTER_RADIUS, 1)
 
-    def run_app(self):
+    def run_app(self, profile_seconds=None):
         """
         Bucle principal de la aplicación.
+        profile_seconds: perfilar los primeros segundos del bucle (como al pulsar P).
         """
         if not hasattr(self, 'eye_tracker'):
             return
         self._run_calibration_sequence()
         self._update_suggestions_display()
+        if profile_seconds:
+            self._start_profile_capture(profile_seconds)
         while self.running:
-            self._handle_events()
-            self._update_gaze()
-            self._handle_state_and_selection()
-            self._draw()
+            self._run_frame()
             self.clock.tick(config.FPS)
+            if self.profile_capture and self.profile_capture.update():
+                self._stop_profile_capture()
+        if self.profile_capture:
+            self._stop_profile_capture()
+        for writer in self.profile_writers:
+            writer.join()
         if self.tts_engine:
             self.tts_engine.stop()
         self.eye_tracker.release()
+        if self.journal:
+            self.journal.discard()  # Salida normal: no hay nada que recuperar en el próximo inicio
+        if self.event_server:
+            self.event_server.stop()
         pygame.quit()
 
+    def _run_frame(self):
+        """
+        Un ciclo del bucle principal: eventos, mirada, selección y dibujo.
+        """
+        self._handle_events()
+        self._update_gaze()
+        self._handle_state_and_selection()
+        self._draw()
+
     # Métodos auxiliares para áreas de interacción, sugerencias, eventos y dibujo
     def get_total_interaction_area_rect(self):
         return self.total_interaction_rect
@@ -320,48 +388,91 @@ class EyeTyperApp:
                 if event.key == pygame.K_c:
                     print("Forzando recalibración...")
                     self._run_calibration_sequence()
+                if event.key == pygame.K_p:
+                    if self.profile_capture:
+                        self._stop_profile_capture()
+                    else:
+                        self._start_profile_capture(config.PROFILE_DURATION_S)
+
+    def _start_profile_capture(self, duration_s):
+        self.profile_capture = ProfileCapture(duration_s)
+
+    def _stop_profile_capture(self):
+        self.profile_writers = [w for w in self.profile_writers if w.is_alive()]
+        self.profile_writers.append(self.profile_capture.stop())
+        self.profile_capture = None
 
     def _update_suggestions_display(self):
         """
         Actualiza las sugerencias de palabras según el texto escrito.
         """
-        words_in_text = self.typed_text.split(' ')
-        current_word_prefix = ""
-        if self.typed_text and not self.typed_text.endswith(' ') and not self.typed_text.endswith('\n'):
-            current_word_prefix = words_in_text[-1]
+        current_word_prefix = self.document.current_word()
         self.current_suggestions_text = self.word_suggester.get_suggestions(current_word_prefix)
+        if config.PREDICTIVE_KEY_SIZING:
+            self.keyboard.set_key_probabilities(self.word_suggester.next_letter_probabilities(current_word_prefix))
+            if self.keyboard.last_layout_update_ms > config.PREDICTIVE_LAYOUT_BUDGET_MS:
+                print(f"Aviso: recalcular el teclado predictivo tardó {self.keyboard.last_layout_update_ms:.1f} ms")
         self.suggestion_boxes = []
         for i, sug_text in enumerate(self.current_suggestions_text):
             if i < len(self.base_suggestion_rects):
                 rect = self.base_suggestion_rects[i]
                 self.suggestion_boxes.append(SuggestionBox(sug_text, rect.x, rect.y, rect.width, rect.height, self.font_suggestion))
 
-    def _draw_text_area(self):
+    def _wrap_text_from(self, start, available_width):
         """
-        Dibuja el área de texto donde se muestra lo escrito.
+        Ajusta al ancho el texto desde la posición start (inicio de una línea) hasta el final.
+        Una palabra más ancha que el área ocupa su propia línea (sin línea vacía antes), así
+        cada línea empieza en una posición distinta y se puede reanudar el ajuste desde ella.
         """
-        pygame.draw.rect(self.screen, config.TEXT_AREA_COLOR, (config.TEXT_AREA_X, config.TEXT_AREA_Y, config.TEXT_AREA_WIDTH, config.TEXT_AREA_HEIGHT))
-        pygame.draw.rect(self.screen, config.BLACK, (config.TEXT_AREA_X, config.TEXT_AREA_Y, config.TEXT_AREA_WIDTH, config.TEXT_AREA_HEIGHT), 2)
-        lines_to_display = []
-        padding = 10
-        available_width = config.TEXT_AREA_WIDTH - 2 * padding
-        for text_line in self.typed_text.split('\n'):
-            words = text_line.split(' ')
+        lines = []
+        position = start
+        for text_line in self.document.slice(start, len(self.document)).split('\n'):
+            line_start = word_start = position
             current_line_text = ""
-            for word in words:
+            for word in text_line.split(' '):
                 test_line = current_line_text + word + " "
-                if self.font_text_area.size(test_line)[0] <= available_width:
+                if not current_line_text.strip() or self.font_text_area.size(test_line)[0] <= available_width:
                     current_line_text = test_line
                 else:
-                    lines_to_display.append(current_line_text.strip())
+                    lines.append((line_start, current_line_text.strip()))
                     current_line_text = word + " "
-            lines_to_display.append(current_line_text.strip())
+                    line_start = word_start
+                word_start += len(word) + 1
+            lines.append((line_start, current_line_text.strip()))
+            position += len(text_line) + 1
+        return lines
+
+    def _get_text_lines(self, available_width):
+        """
+        Líneas del texto ajustadas al ancho. Solo se recalculan las líneas desde la primera
+        modificación (más dos de margen, porque acortar una palabra puede subirla a la línea anterior).
+        """
+        if self._text_lines_version == self.document.version:
+            return self._text_lines
+        dirty_from = self.document.take_dirty_from()
+        keep = 0
+        while keep + 1 < len(self._text_lines) and self._text_lines[keep + 1][0] <= dirty_from:
+            keep += 1
+        keep = max(0, keep - 2)
+        restart = self._text_lines[keep][0] if keep < len(self._text_lines) else 0
+        self._text_lines = self._text_lines[:keep] + self._wrap_text_from(restart, available_width)
+        self._text_lines_version = self.document.version
+        return self._text_lines
+
+    def _draw_text_area(self):
+        """
+        Dibuja el área de texto donde se muestra lo escrito.
+        """
+        pygame.draw.rect(self.screen, config.TEXT_AREA_COLOR, (config.TEXT_AREA_X, config.TEXT_AREA_Y, config.TEXT_AREA_WIDTH, config.TEXT_AREA_HEIGHT))
+        pygame.draw.rect(self.screen, config.BLACK, (config.TEXT_AREA_X, config.TEXT_AREA_Y, config.TEXT_AREA_WIDTH, config.TEXT_AREA_HEIGHT), 2)
+        padding = 10
+        lines_to_display = self._get_text_lines(config.TEXT_AREA_WIDTH - 2 * padding)
         y_offset = config.TEXT_AREA_Y + padding
         line_height = self.font_text_area.get_linesize()
         max_lines_in_area = (config.TEXT_AREA_HEIGHT - 2 * padding) // line_height if line_height > 0 else 0
         start_display_line = max(0, len(lines_to_display) - max_lines_in_area)
         for i in range(start_display_line, len(lines_to_display)):
-            line_surface = self.font_text_area.render(lines_to_display[i], True, config.BLACK)
+            line_surface = self.font_text_area.render(lines_to_display[i][1], True, config.BLACK)
             self.screen.blit(line_surface, (config.TEXT_AREA_X + padding, y_offset))
             y_offset += line_height
 
@@ -376,7 +487,7 @@ class EyeTyperApp:
         """
         Dibuja información de depuración (frame de cámara, estado de mayúsculas, etc).
         """
-        annotated_frame = self.eye_tracker.get_annotated_frame()
+        annotated_frame = self.eye_tracker.get_annotated_frame() if config.SHOW_DEBUG_CAMERA else None
         if annotated_frame is not None and annotated_frame.size > 0:
             try:
                 h, w = annotated_frame.shape[:2]
@@ -384,9 +495,15 @@ class EyeTyperApp:
                     target_h = 120
                     aspect_ratio = w / h
                     target_w = int(target_h * aspect_ratio)
-                    resized_frame = cv2.resize(annotated_frame, (target_w, target_h))
-                    pygame_frame = pygame.surfarray.make_surface(cv2.cvtColor(resized_frame, cv2.COLOR_BGR2RGB).swapaxes(0, 1))
-                    self.screen.blit(pygame_frame, (config.SCREEN_WIDTH - target_w - 10, 10))
+                    # Miniatura sobre buffers y superficie reutilizados entre frames
+                    if self._debug_thumb_surface is None or self._debug_thumb_surface.get_size() != (target_w, target_h):
+                        self._debug_thumb_bgr = np.empty((target_h, target_w, 3), dtype=np.uint8)
+                        self._debug_thumb_rgb = np.empty((target_h, target_w, 3), dtype=np.uint8)
+                        self._debug_thumb_surface = pygame.Surface((target_w, target_h))
+                    cv2.resize(annotated_frame, (target_w, target_h), dst=self._debug_thumb_bgr)
+                    cv2.cvtColor(self._debug_thumb_bgr, cv2.COLOR_BGR2RGB, dst=self._debug_thumb_rgb)
+                    pygame.surfarray.blit_array(self._debug_thumb_surface, self._debug_thumb_rgb.swapaxes(0, 1))
+                    self.screen.blit(self._debug_thumb_surface, (config.SCREEN_WIDTH - target_w - 10, 10))
             except Exception as e:
                 print(f"Error al dibujar frame de depuración: {e}")
         caps_status = "Mayús: ON" if self.keyboard.caps_lock_on else "Mayús: OFF"
@@ -396,6 +513,10 @@ class EyeTyperApp:
             raw_text = f"Raw Gaze: ({self.eye_tracker.raw_gaze_ratio[0]:.2f}, {self.eye_tracker.raw_gaze_ratio[1]:.2f})"
             text_s_raw = self.font_info.render(raw_text, True, config.BLUE)
             self.screen.blit(text_s_raw, (10, config.SCREEN_HEIGHT - 60))
+        ear_baseline = self.eye_tracker.blink_detector.get_baseline()
+        ear_text = f"EAR: {self.eye_tracker.current_ear:.2f}" + (f" (base {ear_baseline:.2f})" if ear_baseline else "")
+        ear_surf = self.font_info.render(ear_text, True, config.WHITE)
+        self.screen.blit(ear_surf, (10, config.SCREEN_HEIGHT - 90))
 
     def _draw(self):
         """
@@ -412,6 +533,13 @@ class EyeTyperApp:
 
 # --- Punto de entrada principal ---
 if __name__ == '__main__':
-    app = EyeTyperApp()
+    parser = argparse.ArgumentParser(description="EyeTyper - Escritura por Mirada")
+    parser.add_argument("--event-server", nargs="?", const=config.EVENT_SERVER_ADDRESS,
+                        default=config.EVENT_SERVER_ADDRESS if config.EVENT_SERVER_ENABLED else None,
+                        metavar="DIRECCIÓN", help="Publicar eventos en host:puerto o unix:/ruta (ver event_server.py)")
+    parser.add_argument("--profile", type=float, nargs="?", const=config.PROFILE_DURATION_S, metavar="SEGUNDOS",
+                        help="Perfilar los primeros segundos del bucle principal (también con la tecla P)")
+    args = parser.parse_args()
+    app = EyeTyperApp(event_server_address=args.event_server)
     if hasattr(app, 'running'):
-        app.run_app()
\ No newline at end of file
+        app.run_app(profile_seconds=args.profile)
\ No newline at end of file
@@ -0,0 +1,98 @@
+# profiler.py
+"""
+Captura de perfil bajo demanda del bucle principal (tecla P o python main.py --profile N).
+
+Durante N segundos se perfila el hilo de la interfaz con cProfile y se rastrean las
+asignaciones con tracemalloc. Al terminar se guardan en PROFILE_OUTPUT_DIR:
+  perfil_<fecha>_<hora>.pstats  -> para abrir con pstats, snakeviz, etc.
+  perfil_<fecha>_<hora>.txt     -> funciones con más tiempo acumulado y sitios que más memoria
+                                   asignaron durante la captura (diferencia entre instantáneas)
+Los informes se escriben en un hilo aparte para no perder frames al detener la captura.
+La instantánea final de tracemalloc sí se toma en el hilo de la interfaz y su costo crece con
+los bloques vivos rastreados: si el rastreo supera PROFILE_TRACEMALLOC_MAX_KB se toma en ese
+momento y la memoria solo cubre esa primera parte de la captura. El costo medido se informa.
+"""
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import config
+
+
+class ProfileCapture:
+    """
+    Una captura en curso. La aplicación solo guarda una referencia mientras está activa,
+    así que sin captura el costo es una comprobación de atributo por frame.
+    """
+    def __init__(self, duration_s=config.PROFILE_DURATION_S, output_dir=config.PROFILE_OUTPUT_DIR):
+        self.duration_s = duration_s
+        self.output_dir = output_dir
+        self.base_name = time.strftime("perfil_%Y%m%d_%H%M%S")
+        self.started_tracemalloc = not tracemalloc.is_tracing()
+        if self.started_tracemalloc:
+            tracemalloc.start(config.PROFILE_TRACEMALLOC_FRAMES)
+        self.snapshot_start = tracemalloc.take_snapshot()
+        self.tracemalloc_limit = tracemalloc.get_tracemalloc_memory() + config.PROFILE_TRACEMALLOC_MAX_KB * 1024
+        self.snapshot_end = None
+        self.memory_elapsed = None   # Segundos cubiertos por el rastreo de memoria
+        self.memory_truncated = False  # El rastreo se cerró antes por PROFILE_TRACEMALLOC_MAX_KB
+        self.tracing_stop_ms = None  # Costo de la instantánea final + tracemalloc.stop()
+        self.profile = cProfile.Profile()
+        self.start_time = time.perf_counter()
+        self.profile.enable()
+        print(f"Perfilando durante {duration_s:g} s...")
+
+    def update(self):
+        """
+        Se llama una vez por frame. Cierra el rastreo de memoria si agotó su presupuesto y
+        devuelve True cuando se cumplió la duración de la captura.
+        """
+        if self.snapshot_end is None and tracemalloc.get_tracemalloc_memory() > self.tracemalloc_limit:
+            self.memory_truncated = True
+            self._stop_tracing()
+        return time.perf_counter() - self.start_time >= self.duration_s
+
+    def _stop_tracing(self):
+        start = time.perf_counter()
+        self.snapshot_end = tracemalloc.take_snapshot()
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+        self.tracing_stop_ms = (time.perf_counter() - start) * 1000
+        self.memory_elapsed = start - self.start_time
+        print(f"Instantánea de memoria tomada a los {self.memory_elapsed:.1f} s en {self.tracing_stop_ms:.1f} ms")
+
+    def stop(self):
+        """Detiene la captura y escribe los informes en segundo plano. Devuelve el hilo escritor."""
+        self.profile.disable()
+        elapsed = time.perf_counter() - self.start_time
+        if self.snapshot_end is None:
+            self._stop_tracing()
+        writer = threading.Thread(target=self._write_reports, args=(self.snapshot_end, elapsed), name="ProfileWriter")
+        writer.start()
+        return writer
+
+    def _write_reports(self, snapshot_end, elapsed):
+        os.makedirs(self.output_dir, exist_ok=True)
+        base_path = os.path.join(self.output_dir, self.base_name)
+        self.profile.dump_stats(base_path + ".pstats")
+
+        report = io.StringIO()
+        report.write(f"Captura de {elapsed:.1f} s ({self.base_name})\n\n")
+        report.write(f"=== Top {config.PROFILE_TOP_N} funciones por tiempo acumulado ===\n")
+        pstats.Stats(self.profile, stream=report).sort_stats("cumulative").print_stats(config.PROFILE_TOP_N)
+
+        # Solo asignaciones de este programa (sin las del propio tracemalloc / importaciones)
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+        diff = snapshot_end.filter_traces(filters).compare_to(self.snapshot_start.filter_traces(filters), "lineno")
+        report.write(f"\n=== Top {config.PROFILE_TOP_N} sitios de asignación (memoria nueva durante la captura) ===\n")
+        if self.memory_truncated:
+            report.write(f"Solo los primeros {self.memory_elapsed:.1f} s: el rastreo superó PROFILE_TRACEMALLOC_MAX_KB.\n")
+        report.write(f"Instantánea final: {len(snapshot_end.traces)} bloques, {self.tracing_stop_ms:.1f} ms en el hilo de la interfaz.\n")
+        for stat in diff[:config.PROFILE_TOP_N]:
+            report.write(f"{stat}\n")
+        with open(base_path + ".txt", "w", encoding="utf-8") as f:
+            f.write(report.getvalue())
+        print(f"Perfil guardado en {base_path}.pstats y {base_path}.txt")
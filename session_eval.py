@@ -0,0 +1,388 @@
+# session_eval.py
+"""
+Evaluación offline y barrido de parámetros sobre sesiones grabadas.
+
+Cada sesión es un directorio con:
+  session.json -> {"video": "video.mp4",
+                   "calibration": {<mismas claves que Calibration.calibration_data>},
+                   "interaction_rect": [x, y, ancho, alto],   (opcional)
+                   "targets": [{"start_ms": 0, "end_ms": 2500, "key": "a"}, ...],
+                   "blinks": [{"start_ms": 1900, "end_ms": 2250, "deliberate": true}, ...]}  (opcional)
+  video.mp4    -> grabación de la webcam tal como la entrega cv2.VideoCapture (sin espejar)
+
+"key" es el carácter de acción de la tecla (Key.char): 'a', 'Borrar', ' ', 'LEER', ...
+o el texto de una sugerencia ('hola'). La selección la decide la lógica real de EyeTyperApp.
+"blinks" etiqueta los parpadeos reales; con él se reportan precisión y recall del detector
+de parpadeos voluntarios (BlinkDetector).
+
+Los landmarks de cada video se extraen una sola vez con EyeTracker y se guardan en
+landmarks_cache.npz dentro de la sesión; los barridos posteriores solo reproducen el caché.
+
+Uso:
+  python session_eval.py sesiones/ --smoothing 0.05,0.07,0.1 --sensitivity 1.5,1.7 --dwell 600,800 \
+      --close-sigmas 2.5,3 --close-drop 0.2,0.25 --deliberate-ms 200,250
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import contextlib
+import csv
+import functools
+import io
+import itertools
+import json
+import math
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+import pygame
+import config
+from eye_tracker import EyeTracker
+from keyboard_ui import Key, Keyboard
+from main import EyeTyperApp
+from word_suggester import WordSuggester
+
+SESSION_FILE = "session.json"
+CACHE_FILE = "landmarks_cache.npz"
+CACHE_VERSION = 1
+NUM_FACE_LANDMARKS = 478  # FaceMesh con refine_landmarks=True
+BLINK_MATCH_TOLERANCE_MS = 100
+
+LandmarkPoint = namedtuple("LandmarkPoint", ["x", "y"])
+
+
+class CachedFaceLandmarks:
+    """
+    Imita el objeto de MediaPipe (face_landmarks.landmark[i].x / .y) sobre una fila del caché.
+    """
+    __slots__ = ("_points",)
+
+    def __init__(self, points):
+        self._points = points
+
+    @property
+    def landmark(self):
+        return self
+
+    def __getitem__(self, index):
+        x, y = self._points[index]
+        return LandmarkPoint(float(x), float(y))
+
+
+def load_session(session_dir):
+    with open(os.path.join(session_dir, SESSION_FILE), 'r', encoding='utf-8') as f:
+        session = json.load(f)
+    session["targets"] = sorted(session.get("targets", []), key=lambda t: t["start_ms"])
+    return session
+
+
+def find_sessions(root_dir):
+    """
+    Devuelve los directorios (root_dir o sus subdirectorios directos) que contienen session.json.
+    """
+    if os.path.isfile(os.path.join(root_dir, SESSION_FILE)):
+        return [root_dir]
+    return sorted(os.path.join(root_dir, name) for name in os.listdir(root_dir)
+                  if os.path.isfile(os.path.join(root_dir, name, SESSION_FILE)))
+
+
+def _cache_is_valid(cache_path, video_stat):
+    if not os.path.isfile(cache_path):
+        return False
+    try:
+        with np.load(cache_path) as data:
+            return (int(data["version"]) == CACHE_VERSION and
+                    float(data["source_mtime"]) == video_stat.st_mtime and
+                    int(data["source_size"]) == video_stat.st_size)
+    except (OSError, KeyError, ValueError):
+        return False
+
+
+def extract_landmarks(session_dir):
+    """
+    Ejecuta EyeTracker (FaceMesh) sobre el video de la sesión y guarda los landmarks en caché.
+    Si el caché corresponde al video actual (mismo tamaño y fecha) no se vuelve a inferir.
+    """
+    session = load_session(session_dir)
+    video_path = os.path.join(session_dir, session["video"])
+    cache_path = os.path.join(session_dir, CACHE_FILE)
+    video_stat = os.stat(video_path)
+    if _cache_is_valid(cache_path, video_stat):
+        return cache_path
+
+    tracker = EyeTracker(video_source=video_path)
+    fps = tracker.webcam.get(cv2.CAP_PROP_FPS) or config.FPS
+    timestamps, points, has_face = [], [], []
+    try:
+        while tracker.update_frame():
+            frame_points = np.zeros((NUM_FACE_LANDMARKS, 2), dtype=np.float32)
+            face_landmarks = tracker.current_face_landmarks
+            if face_landmarks is not None:
+                for i, lm in enumerate(face_landmarks.landmark[:NUM_FACE_LANDMARKS]):
+                    frame_points[i] = (lm.x, lm.y)
+            timestamps.append(len(timestamps) * 1000.0 / fps)
+            points.append(frame_points)
+            has_face.append(face_landmarks is not None)
+    finally:
+        tracker.release()
+
+    tmp_path = cache_path + ".tmp.npz"
+    np.savez_compressed(tmp_path, version=CACHE_VERSION,
+                        source_mtime=video_stat.st_mtime, source_size=video_stat.st_size,
+                        timestamps_ms=np.array(timestamps, dtype=np.float64),
+                        landmarks=np.array(points, dtype=np.float32).reshape(-1, NUM_FACE_LANDMARKS, 2),
+                        has_face=np.array(has_face, dtype=bool))
+    os.replace(tmp_path, cache_path)
+    print(f"Landmarks extraídos: {session_dir} ({len(timestamps)} frames)")
+    return cache_path
+
+
+@functools.lru_cache(maxsize=8)
+def _load_cache(cache_path):
+    with np.load(cache_path) as data:
+        return data["timestamps_ms"], data["landmarks"], data["has_face"]
+
+
+class ReplayEyeTracker(EyeTracker):
+    """
+    EyeTracker sin cámara que entrega, en cada update_frame, el siguiente frame del caché de landmarks.
+    """
+    def __init__(self, timestamps, landmarks, has_face):
+        super().__init__(capture=False)
+        self.timestamps, self.landmarks, self.has_face = timestamps, landmarks, has_face
+        self.index = -1
+
+    def update_frame(self):
+        self.index += 1
+        if self.index >= len(self.timestamps):
+            return False
+        i = self.index
+        self.process_landmarks(CachedFaceLandmarks(self.landmarks[i]) if self.has_face[i] else None,
+                               float(self.timestamps[i]))
+        return True
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_word_suggester():
+    # Una carga del léxico (e índice de clasificación) por proceso, compartida por todas las tareas
+    return WordSuggester(key_positions=Keyboard(config.SCREEN_WIDTH).get_key_centers())
+
+
+class ReplayEyeTyperApp(EyeTyperApp):
+    """
+    EyeTyperApp real (mirada -> fijación -> congelación -> parpadeo, teclas y sugerencias) con el
+    reloj de la grabación. Registra cada elemento seleccionado en clicks. Sin sonido ni voz, y
+    con el sugeridor compartido del proceso.
+    """
+    def __init__(self, eye_tracker):
+        super().__init__(eye_tracker=eye_tracker, autosave=False, audio=False,
+                         word_suggester=_shared_word_suggester())
+        self.clicks = []
+
+    def _now_ms(self):
+        return float(self.eye_tracker.timestamps[self.eye_tracker.index])
+
+    def _speak_text(self, text_to_speak):
+        pass
+
+    def _execute_click(self, selected_item):
+        if selected_item:
+            self.clicks.append(selected_item)
+        super()._execute_click(selected_item)
+
+
+def _item_value(item):
+    return item.char if isinstance(item, Key) else item.text
+
+
+def evaluate_session(session_dir, params):
+    """
+    Reproduce una sesión con un juego de parámetros y devuelve sumas crudas de métricas.
+    Se ejecuta la lógica de selección de EyeTyperApp (_update_gaze + _handle_state_and_selection),
+    así que incluye las sugerencias: un objetivo "key" se cumple con una tecla (Key.char) o una
+    sugerencia (texto) con ese valor.
+    """
+    session = load_session(session_dir)
+    timestamps, landmarks, has_face = _load_cache(os.path.join(session_dir, CACHE_FILE))
+
+    tracker = ReplayEyeTracker(timestamps, landmarks, has_face)
+    tracker.smoothing_factor = params["smoothing"]
+    tracker.blink_detector.close_sigmas = params["close_sigmas"]
+    tracker.blink_detector.close_min_drop = params["close_drop"]
+    tracker.blink_detector.deliberate_min_ms = params["deliberate_ms"]
+    with contextlib.redirect_stdout(io.StringIO()):  # Sin los mensajes de arranque en cada evaluación
+        app = ReplayEyeTyperApp(tracker)
+    if session.get("interaction_rect"):
+        app.total_interaction_rect = pygame.Rect(*session["interaction_rect"])
+    app.DWELL_TO_FREEZE_MS = params["dwell_ms"]
+    calibration = app.calibration
+    calibration.calibration_data.update(session["calibration"])
+    calibration.sensitivity_scaler = params["sensitivity"]
+    calibration.is_calibrated = True
+    app._update_suggestions_display()
+
+    targets = session["targets"]
+    target_done = [False] * len(targets)
+    target_idx = 0
+    correct = false_selections = 0
+    latency_sum = 0.0
+    jitter_sq_sum = 0.0; jitter_count = 0
+    previous_gaze = None
+    detected_blinks = []
+
+    for i in range(len(timestamps)):
+        now = float(timestamps[i])
+        app._update_gaze()
+        blink_event = tracker.blink_detector.blink_event
+        if blink_event is not None and blink_event.deliberate:
+            detected_blinks.append(blink_event)
+        gaze_coords = tracker.get_gaze_screen_coordinates()
+
+        while target_idx < len(targets) and targets[target_idx]["end_ms"] < now:
+            target_idx += 1
+        active = target_idx if target_idx < len(targets) and targets[target_idx]["start_ms"] <= now else None
+
+        # Jitter: desplazamiento entre frames del puntero libre mientras el usuario fija un objetivo
+        if active is not None and app.app_state == "NAVIGATING" and gaze_coords and previous_gaze:
+            jitter_sq_sum += (gaze_coords[0] - previous_gaze[0]) ** 2 + (gaze_coords[1] - previous_gaze[1]) ** 2
+            jitter_count += 1
+        previous_gaze = gaze_coords if app.app_state == "NAVIGATING" else None
+
+        app.clicks.clear()
+        app._handle_state_and_selection()
+        for clicked in app.clicks:
+            if active is not None and not target_done[active] and _item_value(clicked) == targets[active]["key"]:
+                target_done[active] = True
+                correct += 1
+                latency_sum += now - targets[active]["start_ms"]
+            else:
+                false_selections += 1
+
+    blink_tp, blink_gt = _match_blinks(detected_blinks, session.get("blinks", []))
+    return {"targets": len(targets), "correct": correct, "false_selections": false_selections,
+            "latency_sum": latency_sum, "jitter_sq_sum": jitter_sq_sum, "jitter_count": jitter_count,
+            "blink_tp": blink_tp, "blink_detected": len(detected_blinks) if "blinks" in session else 0,
+            "blink_gt": blink_gt}
+
+
+def _match_blinks(detected_blinks, labeled_blinks):
+    """
+    Empareja parpadeos voluntarios detectados con los etiquetados ("deliberate": true, por defecto).
+    Un detectado cuenta como acierto si se solapa (con tolerancia) con un etiquetado aún libre.
+    Devuelve (aciertos, total etiquetados).
+    """
+    labeled = [b for b in labeled_blinks if b.get("deliberate", True)]
+    used = [False] * len(labeled)
+    tp = 0
+    for event in detected_blinks:
+        end_ms = event.start_ms + event.duration_ms
+        for j, b in enumerate(labeled):
+            if (not used[j] and event.start_ms <= b["end_ms"] + BLINK_MATCH_TOLERANCE_MS
+                    and end_ms >= b["start_ms"] - BLINK_MATCH_TOLERANCE_MS):
+                used[j] = True
+                tp += 1
+                break
+    return tp, len(labeled)
+
+
+def _evaluate_task(task):
+    session_dir, params = task
+    return params, evaluate_session(session_dir, params)
+
+
+def _parse_values(text, cast):
+    return [cast(v) for v in text.split(',') if v.strip()]
+
+
+def rank_results(task_results):
+    """
+    Agrega los resultados por juego de parámetros y los ordena:
+    más precisión, menos selecciones erróneas, menos jitter y menos latencia.
+    """
+    totals = {}
+    for params, metrics in task_results:
+        key = tuple(sorted(params.items()))
+        acc = totals.setdefault(key, dict.fromkeys(metrics, 0))
+        for name, value in metrics.items():
+            acc[name] += value
+    rows = []
+    for key, acc in totals.items():
+        row = dict(key)
+        row["accuracy"] = acc["correct"] / acc["targets"] if acc["targets"] else 0.0
+        row["false_selections"] = acc["false_selections"]
+        row["jitter_px"] = math.sqrt(acc["jitter_sq_sum"] / acc["jitter_count"]) if acc["jitter_count"] else 0.0
+        row["latency_ms"] = acc["latency_sum"] / acc["correct"] if acc["correct"] else float('inf')
+        row["blink_precision"] = acc["blink_tp"] / acc["blink_detected"] if acc["blink_detected"] else None
+        row["blink_recall"] = acc["blink_tp"] / acc["blink_gt"] if acc["blink_gt"] else None
+        rows.append(row)
+    rows.sort(key=lambda r: (-r["accuracy"], r["false_selections"], r["jitter_px"], r["latency_ms"]))
+    return rows
+
+
+def print_table(rows, top=None):
+    header = (f"{'#':>3} {'suav.':>6} {'sens.':>6} {'dwell':>6} {'σ cierre':>8} {'caída':>6} {'volunt.':>7} {'precisión':>10} {'errores':>8} {'jitter px':>10} "
+              f"{'latencia ms':>12} {'parp. P':>8} {'parp. R':>8}")
+    print(header)
+    print("-" * len(header))
+    pct = lambda value: f"{value * 100:>7.1f}%" if value is not None else f"{'-':>8}"
+    for rank, r in enumerate(rows[:top] if top else rows, start=1):
+        print(f"{rank:>3} {r['smoothing']:>6.3f} {r['sensitivity']:>6.2f} {r['dwell_ms']:>6.0f} "
+              f"{r['close_sigmas']:>8.2f} {r['close_drop']:>6.2f} {r['deliberate_ms']:>7.0f} "
+              f"{r['accuracy'] * 100:>9.1f}% {r['false_selections']:>8} {r['jitter_px']:>10.2f} {r['latency_ms']:>12.0f} "
+              f"{pct(r['blink_precision'])} {pct(r['blink_recall'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluación offline y barrido de parámetros sobre sesiones grabadas.")
+    parser.add_argument("sessions_dir", help="Directorio de una sesión o que contiene varias sesiones")
+    parser.add_argument("--smoothing", default=str(config.GAZE_SMOOTHING_FACTOR), help="Valores de GAZE_SMOOTHING_FACTOR separados por comas")
+    parser.add_argument("--sensitivity", default=str(config.GAZE_SENSITIVITY_SCALER), help="Valores de GAZE_SENSITIVITY_SCALER separados por comas")
+    parser.add_argument("--dwell", default=str(config.DWELL_TO_FREEZE_MS), help="Tiempos de fijación (ms) separados por comas")
+    parser.add_argument("--close-sigmas", default=str(config.BLINK_CLOSE_SIGMAS), help="Valores de BLINK_CLOSE_SIGMAS separados por comas")
+    parser.add_argument("--close-drop", default=str(config.BLINK_CLOSE_MIN_DROP), help="Valores de BLINK_CLOSE_MIN_DROP separados por comas")
+    parser.add_argument("--deliberate-ms", default=str(config.BLINK_DELIBERATE_MIN_MS), help="Valores de BLINK_DELIBERATE_MIN_MS separados por comas")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Procesos en paralelo")
+    parser.add_argument("--top", type=int, default=20, help="Filas a mostrar (0 = todas)")
+    parser.add_argument("--csv", help="Guardar la tabla completa en este archivo CSV")
+    args = parser.parse_args()
+
+    sessions = find_sessions(args.sessions_dir)
+    if not sessions:
+        parser.error(f"No se encontraron sesiones ({SESSION_FILE}) en '{args.sessions_dir}'.")
+
+    grid = [dict(smoothing=s, sensitivity=g, dwell_ms=d, close_sigmas=cs, close_drop=cd, deliberate_ms=dm)
+            for s, g, d, cs, cd, dm in itertools.product(_parse_values(args.smoothing, float),
+                                                         _parse_values(args.sensitivity, float),
+                                                         _parse_values(args.dwell, float),
+                                                         _parse_values(args.close_sigmas, float),
+                                                         _parse_values(args.close_drop, float),
+                                                         _parse_values(args.deliberate_ms, float))]
+    if not grid:
+        parser.error("Cada parámetro necesita al menos un valor.")
+    print(f"{len(sessions)} sesiones x {len(grid)} combinaciones de parámetros")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(extract_landmarks, sessions))
+        tasks = [(session_dir, params) for params in grid for session_dir in sessions]
+        # Agrupar por sesión dentro de cada lote aprovecha el caché de landmarks de cada proceso
+        tasks.sort(key=lambda t: t[0])
+        chunksize = max(1, len(tasks) // (4 * (args.workers or 1)))
+        task_results = list(pool.map(_evaluate_task, tasks, chunksize=chunksize))
+
+    rows = rank_results(task_results)
+    print_table(rows, args.top or None)
+    if args.csv and rows:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Tabla guardada en {args.csv}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+# conftest.py
+"""
+Configuración común de las pruebas: sin ventana ni audio, con los módulos del proyecto
+importables y el directorio de trabajo en la raíz (los recursos se abren con rutas relativas).
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def project_root(monkeypatch):
+    monkeypatch.chdir(ROOT)
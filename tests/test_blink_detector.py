@@ -0,0 +1,49 @@
+# test_blink_detector.py
+"""Detector de parpadeos adaptativo con un EAR sintético a 30 fps."""
+from blink_detector import BlinkDetector
+
+FRAME_MS = 1000 / 30
+
+
+class _Feed:
+    def __init__(self):
+        self.detector = BlinkDetector()
+        self.now = 0.0
+        self.events = []
+
+    def run(self, ear, duration_ms):
+        end = self.now + duration_ms
+        while self.now < end:
+            event = self.detector.update(ear, ear, self.now)
+            if event: self.events.append(event)
+            self.now += FRAME_MS
+
+
+def test_natural_and_deliberate_blinks():
+    feed = _Feed()
+    feed.run(0.30, 10000)
+    feed.run(0.05, 120); feed.run(0.30, 1000)
+    feed.run(0.05, 350); feed.run(0.30, 1000)
+    assert [e.deliberate for e in feed.events] == [False, True]
+
+
+def test_lower_open_ear_does_not_lock_closed():
+    # El EAR abierto baja ~17% (mirar la fila de abajo) y queda entre cierre y reapertura
+    feed = _Feed()
+    feed.run(0.30, 10000)
+    feed.run(0.25, 100)
+    feed.run(0.05, 300)
+    feed.run(0.25, 10000)
+    assert not feed.detector.is_closed
+    assert abs(feed.detector.get_baseline() - 0.25) < 0.01
+    feed.run(0.05, 350); feed.run(0.25, 1000)
+    assert feed.events and feed.events[-1].deliberate
+
+
+def test_sustained_drop_is_tracked_before_blinking():
+    feed = _Feed()
+    feed.run(0.30, 10000)
+    feed.run(0.25, 20000)
+    assert feed.detector.get_baseline() < 0.26
+    feed.run(0.05, 350); feed.run(0.25, 1000)
+    assert feed.events and feed.events[-1].deliberate
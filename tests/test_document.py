@@ -0,0 +1,29 @@
+# test_document.py
+"""El gap buffer y sus separadores coinciden con operar sobre una cadena normal."""
+import random
+
+from document import TextDocument
+
+
+def test_random_edits_match_plain_string():
+    rng = random.Random(0)
+    document, text, cursor = TextDocument(), "", 0
+    for _ in range(3000):
+        x = rng.random()
+        if x < 0.2:
+            count = rng.randint(1, 5)
+            removed = document.delete_before(count)
+            start = max(0, cursor - count)
+            assert removed == text[start:cursor]
+            text, cursor = text[:start] + text[cursor:], start
+        elif x < 0.3:
+            cursor = rng.randint(0, len(text))
+            document.move_cursor(cursor)
+        else:
+            chunk = rng.choice(["a", "b", "ñ", " ", "\n", "hola ", "  "])
+            document.insert(chunk)
+            text, cursor = text[:cursor] + chunk + text[cursor:], cursor + len(chunk)
+        word_start = max(text.rfind(" ", 0, cursor), text.rfind("\n", 0, cursor)) + 1
+        assert str(document) == text and document.cursor == cursor
+        assert document.current_word() == text[word_start:cursor]
+        assert document.slice(2, len(text) - 1) == text[2:len(text) - 1]
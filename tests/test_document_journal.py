@@ -0,0 +1,25 @@
+# test_document_journal.py
+"""El diario de autoguardado recupera el texto tras un cierre inesperado, pero no tras salir normalmente."""
+from document import DocumentJournal
+
+
+def _type_text(path):
+    journal = DocumentJournal(str(path), fsync=False)
+    document = journal.recover()
+    document.insert("hola mundo")
+    document.delete_before(5)
+    document.insert("amigo")
+    return journal
+
+
+def test_recovers_after_crash(tmp_path):
+    path = tmp_path / "autoguardado.journal"
+    _type_text(path).close()  # Sin discard(): como si el proceso hubiera muerto
+    assert str(DocumentJournal(str(path), fsync=False).recover()) == "hola amigo"
+
+
+def test_clean_exit_discards_journal(tmp_path):
+    path = tmp_path / "autoguardado.journal"
+    _type_text(path).discard()
+    assert not path.exists()
+    assert str(DocumentJournal(str(path), fsync=False).recover()) == ""
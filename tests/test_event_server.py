@@ -0,0 +1,96 @@
+# test_event_server.py
+"""Un cliente reconstruye el texto a partir del saludo y de los eventos edit."""
+import asyncio
+import json
+
+from document import TextDocument
+from event_server import EventServer
+
+
+def _apply(text, event):
+    if event["op"] == "insert":
+        return text[:event["pos"]] + event["text"] + text[event["pos"]:]
+    return text[:event["pos"]] + text[event["pos"] + event["count"]:]
+
+
+async def _follow(path, edit_steps):
+    reader, writer = await asyncio.open_unix_connection(path)
+    hello = json.loads(await reader.readline())
+    assert hello["type"] == "hello"
+    text, seen = hello["text"], []
+    for edit, event_count in edit_steps:
+        edit()
+        for _ in range(event_count):
+            event = json.loads(await reader.readline())
+            assert event["type"] == "edit"
+            text = _apply(text, event)
+        seen.append(text)
+    writer.close()
+    return hello, seen
+
+
+def test_client_follows_edits(tmp_path):
+    path = str(tmp_path / "eventos.sock")
+    document = TextDocument("hola ")
+    server = EventServer("unix:" + path, text=str(document))
+    server.start()
+    document.listeners.append(server)
+    steps = [(lambda: document.insert("mundo"), 1),
+             (lambda: document.delete_before(3), 1),
+             (lambda: document.replace_current_word("amigo"), 2),  # Borrar la palabra + insertar
+             (document.clear, 1)]
+    try:
+        hello, seen = asyncio.run(_follow(path, steps))
+    finally:
+        server.stop()
+    assert hello["text"] == "hola " and hello["cursor"] == 5
+    assert seen == ["hola mundo", "hola mu", "hola amigo", ""]
+
+
+async def _stop_with_clients(path, server):
+    connections = [await asyncio.open_unix_connection(path) for _ in range(2)]
+    for reader, _ in connections:
+        await reader.readline()  # hello
+    await asyncio.to_thread(server.stop)
+    for reader, writer in connections:
+        assert await reader.read() == b""  # El servidor cerró la conexión
+        writer.close()
+
+
+def test_stop_with_connected_clients_is_quiet(tmp_path, caplog):
+    path = str(tmp_path / "eventos.sock")
+    server = EventServer("unix:" + path)
+    server.start()
+    asyncio.run(_stop_with_clients(path, server))
+    assert not server.thread.is_alive()
+    assert not [r for r in caplog.records if r.name == "asyncio"]
+
+
+async def _burst(path, server, total):
+    reader, writer = await asyncio.open_unix_connection(path)
+    assert json.loads(await reader.readline())["type"] == "hello"
+    for n in range(total):  # Sin leer mientras tanto: la cola del cliente se desborda
+        server.publish({"type": "gaze", "n": n})
+    received = dropped = 0
+    while True:
+        event = json.loads(await reader.readline())
+        if event["type"] == "dropped":
+            dropped += event["count"]
+            continue
+        received += 1
+        if event["n"] == total - 1:
+            break
+    writer.close()
+    return received, dropped
+
+
+def test_dropped_counts_account_for_every_event(tmp_path):
+    path = str(tmp_path / "eventos.sock")
+    server = EventServer("unix:" + path, queue_size=8)
+    server.start()
+    try:
+        received, dropped = asyncio.run(_burst(path, server, 20000))
+    finally:
+        server.stop()
+    assert dropped > 0
+    assert received + dropped == 20000
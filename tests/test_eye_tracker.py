@@ -0,0 +1,31 @@
+# test_eye_tracker.py
+"""Fusión de ambos ojos en process_landmarks con landmarks sintéticos."""
+import random
+
+from typing_simulator import SyntheticEyeTracker
+
+FRAME_MS = 1000 / 30
+
+
+def _run(tracker, ratio, frames):
+    tracker.target_ratio = ratio
+    for _ in range(frames):
+        tracker.sim_time_ms += FRAME_MS
+        tracker.update_frame()
+
+
+def test_one_occluded_eye_keeps_gaze_moving():
+    tracker = SyntheticEyeTracker(random.Random(0))
+    _run(tracker, (0.4, 0.5), 90)
+    tracker.right_eye_openness = 0.1  # Ojo derecho ocluido: EAR ~0.04 frente a ~0.4
+    _run(tracker, (0.6, 0.5), 10)
+    assert tracker.eye_weights["right"] == 0 and tracker.eye_weights["left"] > 0
+    assert abs(tracker.raw_gaze_ratio[0] - 0.6) < 0.02
+
+
+def test_both_eyes_closed_freeze_gaze():
+    tracker = SyntheticEyeTracker(random.Random(0))
+    _run(tracker, (0.4, 0.5), 90)
+    tracker.eye_openness = 0.1
+    _run(tracker, (0.6, 0.5), 5)
+    assert abs(tracker.raw_gaze_ratio[0] - 0.4) < 0.02
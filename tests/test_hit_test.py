@@ -0,0 +1,22 @@
+# test_hit_test.py
+"""Con el teclado predictivo, el área agrandada de las teclas no tapa las sugerencias."""
+import random
+
+import config
+from typing_simulator import SimulatedEyeTyperApp, SyntheticEyeTracker
+
+
+def test_suggestion_wins_over_grown_top_row_key(monkeypatch):
+    monkeypatch.setattr(config, "PREDICTIVE_KEY_SIZING", True)
+    app = SimulatedEyeTyperApp(SyntheticEyeTracker(random.Random(0)))
+    app.document.insert("h")
+    app._update_suggestions_display()
+    app.keyboard.set_key_probabilities({"e": 1.0})
+    key_e = next(k for k in app.keyboard.keys if k.char.lower() == "e")
+    box = next(b for b in app.suggestion_boxes if b.rect.left <= key_e.rect.centerx < b.rect.right)
+    point = (key_e.rect.centerx, box.rect.bottom - 3)
+    assert key_e.hit_rect.collidepoint(point)  # El área de la tecla invade la caja
+    key, suggestion = app._hit_test(point)
+    assert key is None and suggestion is box
+    key, suggestion = app._hit_test(key_e.rect.center)
+    assert key is key_e and suggestion is None
@@ -0,0 +1,114 @@
+# test_lexicon.py
+"""Compilación del léxico binario, búsquedas por prefijo, trie implícito y recompilación."""
+import os
+
+import pytest
+
+import lexicon
+from lexicon import Lexicon, build_lexicon, compiled_path_for, is_up_to_date, load_lexicon
+
+SOURCE = """hola 120
+hora 80
+holanda
+árbol 15
+arbusto 3
+año 60
+añejo 7
+ñandú 2
+pingüino 9
+pingüinos
+Casa 40
+casa 55
+x 99
+no-es 10
+"""
+EXPECTED = {"hola": 120, "hora": 80, "holanda": 0, "árbol": 15, "arbusto": 3, "año": 60, "añejo": 7,
+            "ñandú": 2, "pingüino": 9, "pingüinos": 0, "casa": 55}
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "palabras.txt"
+    path.write_text(SOURCE, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def lex(source):
+    lex = Lexicon(build_lexicon(source))
+    yield lex
+    lex.close()
+
+
+def _sorted_words():
+    return sorted(EXPECTED, key=lambda w: w.encode("utf-8"))
+
+
+def test_round_trip_words_and_frequencies(lex):
+    words = _sorted_words()
+    assert list(lex) == words
+    assert [lex.frequency(i) for i in range(len(lex))] == [EXPECTED[w] for w in words]
+    assert lex[-1] == words[-1]
+
+
+@pytest.mark.parametrize("prefix", ["", "h", "ho", "hol", "hola", "holas", "a", "añ", "año", "á",
+                                    "ñ", "ña", "pingü", "pingüinos", "z", "ár"])
+def test_prefix_range_matches_naive_scan(lex, prefix):
+    words = _sorted_words()
+    lo, hi = lex.prefix_range(prefix)
+    assert words[lo:hi] == [w for w in words if w.startswith(prefix)]
+    assert all(not w.startswith(prefix) for w in words[:lo] + words[hi:])
+
+
+def test_children_walk_rebuilds_every_word(lex):
+    found = []
+
+    def walk(lo, hi, prefix):
+        prefix_bytes = prefix.encode("utf-8")
+        if lo < hi and lex.word_bytes(lo) == prefix_bytes:
+            found.append(prefix)
+        for char, child_lo, child_hi in lex.children(lo, hi, len(prefix_bytes)):
+            assert lex.prefix_range(prefix + char) == (child_lo, child_hi)
+            walk(child_lo, child_hi, prefix + char)
+
+    walk(0, len(lex), "")
+    assert found == _sorted_words()
+
+
+def test_rebuilds_when_source_changes(source):
+    lex = load_lexicon(source)
+    assert len(lex) == len(EXPECTED)
+    lex.close()
+    compiled = compiled_path_for(source)
+    assert is_up_to_date(source, compiled)
+    built_at = os.stat(compiled).st_mtime_ns
+
+    lex = load_lexicon(source)  # Sin cambios: no se recompila
+    lex.close()
+    assert os.stat(compiled).st_mtime_ns == built_at
+
+    with open(source, "a", encoding="utf-8") as f:
+        f.write("nuevo 5\n")
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert not is_up_to_date(source, compiled)
+    lex = load_lexicon(source)
+    assert "nuevo" in list(lex) and len(lex) == len(EXPECTED) + 1
+    lex.close()
+
+
+def test_falls_back_to_user_cache_when_source_dir_is_read_only(source, tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    real_build = lexicon.build_lexicon
+
+    def build(source_path, output_path=None):
+        if output_path == compiled_path_for(source_path):
+            raise PermissionError(output_path)
+        return real_build(source_path, output_path)
+
+    monkeypatch.setattr(lexicon, "build_lexicon", build)
+    lex = load_lexicon(source)
+    assert len(lex) == len(EXPECTED)
+    lex.close()
+    assert os.path.exists(lexicon.user_cache_path_for(source))
+    assert not os.path.exists(compiled_path_for(source))
@@ -0,0 +1,16 @@
+# test_profiler.py
+"""La captura de perfil acota el rastreo de memoria y deja el informe en la carpeta pedida."""
+import config
+from profiler import ProfileCapture
+
+
+def test_tracing_budget_stops_tracemalloc_early(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "PROFILE_TRACEMALLOC_MAX_KB", 64)
+    capture = ProfileCapture(duration_s=60, output_dir=str(tmp_path))
+    keep = [str(i) * 3 for i in range(20_000)]  # Muchos bloques vivos nuevos
+    assert not capture.update()
+    assert capture.memory_truncated
+    capture.stop().join()
+    report = next(tmp_path.glob("*.txt")).read_text(encoding="utf-8")
+    assert "PROFILE_TRACEMALLOC_MAX_KB" in report
+    assert len(keep) == 20_000
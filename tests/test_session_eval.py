@@ -0,0 +1,16 @@
+# test_session_eval.py
+"""La reproducción offline no inicializa audio ni voz y reutiliza el sugeridor del proceso."""
+import random
+
+from session_eval import ReplayEyeTyperApp
+from typing_simulator import SyntheticEyeTracker
+
+
+def test_replay_apps_skip_audio_and_share_suggester():
+    first = ReplayEyeTyperApp(SyntheticEyeTracker(random.Random(0)))
+    second = ReplayEyeTyperApp(SyntheticEyeTracker(random.Random(1)))
+    assert first.tts_engine is None and first.sound_letter is None and first.sound_function is None
+    assert first.word_suggester is second.word_suggester
+    first.document.insert("hol")
+    first._update_suggestions_display()
+    assert [b.text for b in first.suggestion_boxes][:1] == ["hola"]
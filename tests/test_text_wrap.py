@@ -0,0 +1,42 @@
+# test_text_wrap.py
+"""El ajuste incremental de líneas del área de texto debe coincidir con el ajuste completo."""
+import random
+
+import config
+from typing_simulator import SimulatedEyeTyperApp, SyntheticEyeTracker
+
+WIDTH = config.TEXT_AREA_WIDTH - 20
+
+
+def _random_edit(document, rng):
+    x = rng.random()
+    if x < 0.15:
+        document.delete_before(rng.randint(1, 4))
+    elif x < 0.25:
+        document.insert(' ')
+    elif x < 0.28:
+        document.insert('\n')
+    elif x < 0.31:
+        document.insert('x' * rng.randint(30, 90))  # Palabra más ancha que el área
+    elif x < 0.34:
+        document.replace_current_word(rng.choice(['palabra', 'a', 'necesitamos']))
+    elif x < 0.40:
+        document.move_cursor(rng.randint(0, len(document)))
+    else:
+        document.insert(rng.choice('abcdefghij'))
+
+
+def test_incremental_wrap_matches_full_wrap():
+    app = SimulatedEyeTyperApp(SyntheticEyeTracker(random.Random(0)))
+    rng = random.Random(1)
+    for step in range(3000):
+        _random_edit(app.document, rng)
+        if rng.random() < 0.5:
+            assert app._get_text_lines(WIDTH) == app._wrap_text_from(0, WIDTH), f"paso {step}"
+
+
+def test_long_word_has_no_empty_line_before_it():
+    app = SimulatedEyeTyperApp(SyntheticEyeTracker(random.Random(0)))
+    app.document.insert('x' * 120 + ' hola')
+    lines = app._wrap_text_from(0, WIDTH)
+    assert [text for _, text in lines] == ['x' * 120, 'hola']
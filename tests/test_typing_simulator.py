@@ -0,0 +1,18 @@
+# test_typing_simulator.py
+"""Prueba de extremo a extremo con el usuario sintético (sin dibujar la interfaz)."""
+from typing_simulator import simulate
+
+
+def test_short_phrase_speed_and_errors():
+    result = simulate(["hola mundo"], draw=False, seed=0)
+    assert result.timeouts == 0
+    assert result.cpm >= 15
+    assert result.error_rate <= 0.05
+
+
+def test_natural_blinks_do_not_click():
+    # Parpadeos naturales muy frecuentes: no deben seleccionar teclas por sí solos
+    result = simulate(["hola"], draw=False, seed=1, natural_blinks_per_min=40)
+    assert result.natural_blinks > 0
+    assert result.error_rate == 0.0
+    assert result.corrections == 0
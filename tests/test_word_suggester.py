@@ -0,0 +1,102 @@
+# test_word_suggester.py
+"""Sugerencias exactas y aproximadas (teclas vecinas, tildes) sobre un léxico pequeño."""
+import contextlib
+import io
+import random
+
+import pytest
+
+import config
+from keyboard_ui import Keyboard
+from word_suggester import WordSuggester
+
+WORDS = """hola 100
+holanda 5
+hora 500
+hoja 300
+árbol 10
+arvol 1000
+casa 800
+cosa 700
+"""
+
+
+def _make_suggester(tmp_path, text):
+    path = tmp_path / "palabras.txt"
+    path.write_text(text, encoding="utf-8")
+    with contextlib.redirect_stdout(io.StringIO()):
+        return WordSuggester(str(path), Keyboard(config.SCREEN_WIDTH).get_key_centers())
+
+
+@pytest.fixture
+def suggester(tmp_path):
+    suggester = _make_suggester(tmp_path, WORDS)
+    yield suggester
+    suggester.words.close()
+
+
+def _cost(suggester, typed, word):
+    # Distancia de edición ponderada entre typed y el mejor prefijo de word (fuerza bruta)
+    row = [j * config.FUZZY_EDIT_COST for j in range(len(word) + 1)]
+    for i, t in enumerate(typed, start=1):
+        new = [i * config.FUZZY_EDIT_COST]
+        for j, w in enumerate(word, start=1):
+            new.append(min(row[j] + config.FUZZY_EDIT_COST, new[j - 1] + config.FUZZY_EDIT_COST,
+                           row[j - 1] + suggester._substitution_cost(t, w)))
+        row = new
+    return min(row)
+
+
+def test_exact_matches_rank_first(suggester):
+    # "hora" y "hoja" son más frecuentes, pero "hol" es prefijo exacto de hola y holanda.
+    # Detrás, las dos aproximadas cuestan 1 (l -> r y l -> j no son vecinas): gana la más frecuente
+    assert suggester.get_suggestions("hol") == ["hola", "holanda", "hora"]
+
+
+def test_neighbouring_key_typos_find_the_word(suggester):
+    assert "hola" in suggester.get_suggestions("hpla")  # o -> p
+    assert "hola" in suggester.get_suggestions("jpla")  # h -> j y o -> p: dos vecinas
+
+
+def test_accents_are_free(suggester):
+    # árbol (costo 0) va delante de arvol (b -> v, tecla vecina) aunque sea menos frecuente
+    assert suggester.get_suggestions("arbol")[:2] == ["árbol", "arvol"]
+
+
+@pytest.mark.parametrize("typed", ["hol", "hpla", "jpla", "arbol", "cada", "coas", "hoka", "xyz"])
+def test_fuzzy_results_are_within_budget_and_sorted(suggester, typed):
+    suggestions = suggester.get_suggestions(typed)
+    costs = [_cost(suggester, typed, w) for w in suggestions]
+    assert all(c <= config.FUZZY_MAX_COST for c in costs)
+    assert costs == sorted(costs)
+    # Ninguna palabra que falte mejora el costo de la peor sugerida (con hueco libre)
+    if len(suggestions) < config.SUGGESTION_COUNT:
+        for line in WORDS.splitlines():
+            word = line.split()[0]
+            if word not in suggestions:
+                assert _cost(suggester, typed, word) > config.FUZZY_MAX_COST
+
+
+def test_pruned_search_matches_brute_force(tmp_path):
+    # Léxico aleatorio con muchos empates de costo: la poda y la parada temprana no deben
+    # cambiar el resultado frente a ordenar todo el léxico por (costo, frecuencia)
+    rng = random.Random(0)
+    letters = "abcdefghijlmnoprstuvz"
+    words = {}
+    while len(words) < 1500:
+        words["".join(rng.choice(letters) for _ in range(rng.randint(2, 8)))] = int(rng.paretovariate(1.2) * 10)
+    suggester = _make_suggester(tmp_path, "".join(f"{w} {f}\n" for w, f in words.items()))
+    lexicon = list(suggester.words)
+    rank = {w: (-suggester.words.frequency(i), len(w.encode("utf-8")), i) for i, w in enumerate(lexicon)}
+    count = config.SUGGESTION_COUNT
+    for _ in range(150):
+        typed = list(rng.choice(lexicon))[:rng.randint(2, 8)]
+        for _ in range(rng.randint(0, 2)):
+            typed[rng.randrange(len(typed))] = rng.choice(letters)
+        typed = "".join(typed)
+        exact = sorted((w for w in lexicon if w.startswith(typed)), key=rank.get)[:count]
+        fuzzy = sorted((c, rank[w], w) for w in lexicon if not w.startswith(typed)
+                       for c in [_cost(suggester, typed, w)] if c <= config.FUZZY_MAX_COST)
+        expected = exact + [w for _, _, w in fuzzy][:count - len(exact)]
+        assert suggester.get_suggestions(typed) == expected, typed
+    suggester.words.close()
@@ -0,0 +1,312 @@
+# typing_simulator.py
+"""
+Simulador de escritura de extremo a extremo, sin webcam ni ventana.
+
+Ejecuta el bucle completo de EyeTyperApp con el driver SDL "dummy" y un reloj simulado.
+Un usuario sintético mira las teclas (sacadas + ruido de fijación, con retardo y jitter
+configurables), parpadea cuando la selección se congela sobre la tecla correcta (y de vez
+en cuando de forma natural, con parpadeos cortos) y corrige con "Borrar" cuando se equivoca. Los landmarks se generan a partir de esa mirada, así que
+se ejercita toda la cadena: EAR/parpadeo -> ratios -> calibración -> selección.
+
+Uso:
+  python typing_simulator.py --jitter 15 --lag 120 --seed 1
+  python typing_simulator.py --min-cpm 20 --max-error-rate 0.05   (código de salida 1 si no se cumple)
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import math
+import random
+import sys
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+import config
+from eye_tracker import (EyeTracker, EAR_LEFT_EYE_LANDMARKS_IDS, EAR_RIGHT_EYE_LANDMARKS_IDS,
+                         LEFT_IRIS_LANDMARKS_IDS, RIGHT_IRIS_LANDMARKS_IDS)
+from keyboard_ui import Key
+from main import EyeTyperApp
+from session_eval import CachedFaceLandmarks, NUM_FACE_LANDMARKS
+
+DEFAULT_PHRASES = ["hola mundo", "quiero agua", "tengo frio", "necesito ayuda", "buenos dias"]
+
+# Calibración del usuario sintético: ratios del iris al mirar los bordes del área de interacción
+SIMULATED_CALIBRATION = {
+    "h_ratio_for_screen_left_gaze": 0.35,
+    "h_ratio_for_screen_right_gaze": 0.65,
+    "v_ratio_for_screen_top_gaze": 0.35,
+    "v_ratio_for_screen_bottom_gaze": 0.65,
+}
+
+# Geometría de los ojos sintéticos en coordenadas normalizadas de imagen
+EYE_WIDTH = 0.10; EYE_OPEN_HEIGHT = 0.04
+LEFT_EYE_ORIGIN = (0.55, 0.43); RIGHT_EYE_ORIGIN = (0.35, 0.43)
+
+SimulationResult = namedtuple("SimulationResult", [
+    "phrases", "chars_typed", "simulated_s", "wall_s", "cpm", "error_rate", "corrections", "timeouts",
+    "natural_blinks"])
+
+
+def _edit_distance(a, b):
+    row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        prev, row[0] = row[0], i
+        for j, cb in enumerate(b, start=1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (ca != cb))
+    return row[-1]
+
+
+class SyntheticEyeTracker(EyeTracker):
+    """
+    EyeTracker sin cámara: cada update_frame construye landmarks a partir del ratio de mirada
+    y la apertura de ojos que fija el simulador, y los procesa con el reloj simulado.
+    """
+    def __init__(self, rng, landmark_noise=0.0):
+        super().__init__(capture=False)
+        self.rng = rng
+        self.landmark_noise = landmark_noise  # Ruido independiente de cada iris, en unidades de ratio
+        self.sim_time_ms = 0.0
+        self.target_ratio = (0.5, 0.5)
+        self.eye_openness = 1.0
+        self.right_eye_openness = None  # None = igual que eye_openness (ambos ojos a la vez)
+        self._points = np.zeros((NUM_FACE_LANDMARKS, 2), dtype=np.float32)
+
+    def _place_eye(self, ids, origin, openness):
+        ox, oy = origin
+        height = EYE_OPEN_HEIGHT * max(openness, 0.05) * (1 + self.rng.gauss(0, 0.03))
+        top = oy + (EYE_OPEN_HEIGHT - height) / 2
+        self._points[ids["P1"]] = (ox, oy + EYE_OPEN_HEIGHT / 2)
+        self._points[ids["P4"]] = (ox + EYE_WIDTH, oy + EYE_OPEN_HEIGHT / 2)
+        for upper, lower, dx in (("P2", "P6", 0.5), ("P3", "P5", 0.4)):
+            self._points[ids[upper]] = (ox + EYE_WIDTH * dx, top)
+            self._points[ids[lower]] = (ox + EYE_WIDTH * dx, top + height)
+
+    def update_frame(self):
+        self._place_eye(EAR_LEFT_EYE_LANDMARKS_IDS, LEFT_EYE_ORIGIN, self.eye_openness)
+        self._place_eye(EAR_RIGHT_EYE_LANDMARKS_IDS, RIGHT_EYE_ORIGIN,
+                        self.eye_openness if self.right_eye_openness is None else self.right_eye_openness)
+        h_ratio, v_ratio = self.target_ratio
+        for iris_ids, (ox, oy) in ((LEFT_IRIS_LANDMARKS_IDS, LEFT_EYE_ORIGIN), (RIGHT_IRIS_LANDMARKS_IDS, RIGHT_EYE_ORIGIN)):
+            iris = (ox + (h_ratio + self.rng.gauss(0, self.landmark_noise)) * EYE_WIDTH,
+                    oy + (v_ratio + self.rng.gauss(0, self.landmark_noise)) * EYE_OPEN_HEIGHT)
+            for index in iris_ids:
+                self._points[index] = iris
+        self.process_landmarks(CachedFaceLandmarks(self._points), self.sim_time_ms)
+        return True
+
+
+class SimulatedUser:
+    """
+    Modelo de ojo del usuario: sacadas hacia el punto que quiere mirar, ruido de fijación,
+    retardo entre la intención y lo que ve la cámara y parpadeos naturales (cortos, a
+    intervalos aleatorios) que el detector no debe tomar por clics.
+    """
+    def __init__(self, rng, start, lag_ms, jitter_px, saccade_ms_per_px=0.08, min_saccade_ms=30,
+                 natural_blinks_per_min=12, natural_blink_ms=(100, 150)):
+        self.rng = rng
+        self.lag_ms = lag_ms
+        self.jitter_px = jitter_px
+        self.saccade_ms_per_px = saccade_ms_per_px
+        self.min_saccade_ms = min_saccade_ms
+        self.position = start
+        self.saccade = None  # (inicio_ms, desde, hasta, duración_ms)
+        self.history = deque()  # (t_ms, x, y) para aplicar el retardo
+        self.natural_blinks_per_min = natural_blinks_per_min
+        self.natural_blink_ms = natural_blink_ms
+        self.natural_blinks = 0
+        self._natural_blink = None  # (inicio_ms, fin_ms) del próximo parpadeo natural
+
+    def look_at(self, point, now_ms):
+        if self.saccade and self.saccade[2] == point:
+            return
+        distance = math.dist(self.position, point)
+        duration = self.min_saccade_ms + distance * self.saccade_ms_per_px
+        self.saccade = (now_ms, self.position, point, duration)
+
+    def gaze_at(self, now_ms):
+        if self.saccade:
+            start, origin, dest, duration = self.saccade
+            progress = min(1.0, (now_ms - start) / duration)
+            progress = progress * progress * (3 - 2 * progress)  # Perfil suave de velocidad
+            self.position = (origin[0] + (dest[0] - origin[0]) * progress,
+                             origin[1] + (dest[1] - origin[1]) * progress)
+        x = self.position[0] + self.rng.gauss(0, self.jitter_px)
+        y = self.position[1] + self.rng.gauss(0, self.jitter_px)
+        self.history.append((now_ms, x, y))
+        while len(self.history) > 1 and self.history[1][0] <= now_ms - self.lag_ms:
+            self.history.popleft()
+        return self.history[0][1], self.history[0][2]
+
+    def is_blinking_naturally(self, now_ms):
+        """True mientras dura un parpadeo natural; los intervalos entre ellos son exponenciales."""
+        if self.natural_blinks_per_min <= 0:
+            return False
+        if self._natural_blink is None or now_ms >= self._natural_blink[1]:
+            if self._natural_blink is not None:
+                self.natural_blinks += 1
+            start = now_ms + self.rng.expovariate(self.natural_blinks_per_min / 60000)
+            self._natural_blink = (start, start + self.rng.uniform(*self.natural_blink_ms))
+        return now_ms >= self._natural_blink[0]
+
+
+class SimulatedEyeTyperApp(EyeTyperApp):
+    """
+    EyeTyperApp con reloj simulado: cada frame avanza 1000 / FPS ms sin esperar.
+    """
+    def __init__(self, eye_tracker):
+        super().__init__(eye_tracker=eye_tracker, autosave=False, audio=False)
+        self.sim_time_ms = 0.0
+
+    def _now_ms(self):
+        return self.sim_time_ms
+
+    def _speak_text(self, text_to_speak):
+        pass
+
+
+def _screen_to_ratio(calibration, point):
+    """Inversa de Calibration.map_gaze_to_screen para el usuario sintético."""
+    rect = calibration.get_interaction_area_rect()
+    data = calibration.calibration_data
+    h_span = (data["h_ratio_for_screen_right_gaze"] - data["h_ratio_for_screen_left_gaze"]) * calibration.sensitivity_scaler
+    v_span = (data["v_ratio_for_screen_bottom_gaze"] - data["v_ratio_for_screen_top_gaze"]) * calibration.sensitivity_scaler
+    h_ratio = data["h_ratio_for_screen_left_gaze"] + (point[0] - rect.left) / rect.width * h_span
+    v_ratio = data["v_ratio_for_screen_top_gaze"] + (point[1] - rect.top) / rect.height * v_span
+    return h_ratio, v_ratio
+
+
+def _find_key(app, char):
+    for key in app.keyboard.keys:
+        if key.char == char or (not key.is_special and key.char.lower() == char):
+            return key
+    return None
+
+
+def _next_goal(app, target, use_suggestions):
+    """Elemento que el usuario quiere seleccionar ahora (None si la frase ya está escrita)."""
+    typed = str(app.document)
+    if typed.rstrip() == target:
+        return None
+    if not (target + " ").startswith(typed):
+        return _find_key(app, 'Borrar')
+    next_char = target[len(typed)]
+    if use_suggestions and next_char != ' ':
+        word_start = typed.rfind(' ') + 1
+        word_end = target.find(' ', word_start)
+        target_word = target[word_start:word_end if word_end != -1 else len(target)]
+        for s_box in app.suggestion_boxes:
+            if s_box.text == target_word and len(target_word) - (len(typed) - word_start) >= 2:
+                return s_box
+    return _find_key(app, next_char)
+
+
+def simulate(phrases=DEFAULT_PHRASES, lag_ms=100, jitter_px=12, blink_ms=350, reaction_ms=200,
+             use_suggestions=True, seed=0, draw=True, phrase_timeout_s=120, landmark_noise=0.01,
+             natural_blinks_per_min=12):
+    """
+    Escribe las frases con el usuario sintético y devuelve un SimulationResult.
+    error_rate es la distancia de edición final entre lo escrito y lo pedido, por carácter.
+    """
+    rng = random.Random(seed)
+    tracker = SyntheticEyeTracker(rng, landmark_noise)
+    app = SimulatedEyeTyperApp(tracker)
+    app.calibration.calibration_data.update(SIMULATED_CALIBRATION)
+    app.calibration.is_calibrated = True
+    user = SimulatedUser(rng, app.get_total_interaction_area_rect().center, lag_ms, jitter_px,
+                         natural_blinks_per_min=natural_blinks_per_min)
+    frame_ms = 1000.0 / config.FPS
+
+    wall_start = time.perf_counter()
+    chars_typed = errors = corrections = timeouts = 0
+    target_chars = 0
+    for target in phrases:
+        app.document.clear()
+        app._update_suggestions_display()
+        phrase_start = app.sim_time_ms
+        blink_until = 0.0; blinked_freeze = None
+        decision_time = app.sim_time_ms + reaction_ms
+        last_version, last_length = app.document.version, len(app.document)
+        while True:
+            now = app.sim_time_ms
+            goal = _next_goal(app, target, use_suggestions)
+            if goal is None:
+                break
+            if now - phrase_start > phrase_timeout_s * 1000:
+                timeouts += 1
+                break
+            if now >= decision_time:
+                user.look_at(goal.rect.center, now)
+            # Parpadeo voluntario cuando la selección se congela sobre el objetivo correcto
+            # (una sola vez por congelación)
+            if (app.app_state == "FROZEN" and app.frozen_start_time != blinked_freeze
+                    and app.frozen_item is not None and app.frozen_item.rect == goal.rect):
+                blink_until = now + blink_ms
+                blinked_freeze = app.frozen_start_time
+            blinking = now < blink_until or user.is_blinking_naturally(now)
+            tracker.eye_openness = 0.1 if blinking else 1.0 + rng.gauss(0, 0.01)
+            tracker.target_ratio = _screen_to_ratio(app.calibration, user.gaze_at(now))
+            tracker.sim_time_ms = now
+
+            if draw:
+                app._run_frame()
+            else:
+                app._handle_events(); app._update_gaze(); app._handle_state_and_selection()
+            if app.document.version != last_version:
+                if len(app.document) < last_length and isinstance(goal, Key) and goal.char == 'Borrar':
+                    corrections += 1
+                last_version, last_length = app.document.version, len(app.document)
+                decision_time = app.sim_time_ms + reaction_ms
+            app.sim_time_ms += frame_ms
+        final_text = str(app.document).rstrip()
+        chars_typed += len(final_text)
+        target_chars += len(target)
+        errors += _edit_distance(final_text, target)
+
+    simulated_s = app.sim_time_ms / 1000
+    wall_s = time.perf_counter() - wall_start
+    tracker.release()
+    return SimulationResult(len(phrases), chars_typed, simulated_s, wall_s,
+                            chars_typed / (simulated_s / 60) if simulated_s else 0.0,
+                            errors / target_chars if target_chars else 0.0, corrections, timeouts,
+                            user.natural_blinks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación de escritura por mirada sin webcam.")
+    parser.add_argument("--phrases", nargs="+", default=DEFAULT_PHRASES, help="Frases a escribir (minúsculas, sin tildes)")
+    parser.add_argument("--lag", type=float, default=100, help="Retardo de la mirada en ms")
+    parser.add_argument("--jitter", type=float, default=12, help="Ruido de fijación en px (desviación típica)")
+    parser.add_argument("--landmark-noise", type=float, default=0.01, help="Ruido independiente de cada iris (unidades de ratio)")
+    parser.add_argument("--blink", type=float, default=350, help="Duración de los parpadeos voluntarios en ms")
+    parser.add_argument("--natural-blinks", type=float, default=12, help="Parpadeos naturales (cortos) por minuto; 0 los desactiva")
+    parser.add_argument("--reaction", type=float, default=200, help="Tiempo de reacción tras cada selección en ms")
+    parser.add_argument("--no-suggestions", action="store_true", help="No usar las sugerencias de palabras")
+    parser.add_argument("--no-draw", action="store_true", help="No dibujar la interfaz (más rápido)")
+    parser.add_argument("--predictive-keys", action="store_true", help="Activar el tamaño predictivo de teclas (PREDICTIVE_KEY_SIZING)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-cpm", type=float, help="Fallar (código 1) si los caracteres por minuto quedan por debajo")
+    parser.add_argument("--max-error-rate", type=float, help="Fallar (código 1) si la tasa de error la supera")
+    args = parser.parse_args()
+
+    if args.predictive_keys:
+        config.PREDICTIVE_KEY_SIZING = True
+    result = simulate(args.phrases, args.lag, args.jitter, args.blink, args.reaction,
+                      not args.no_suggestions, args.seed, not args.no_draw, landmark_noise=args.landmark_noise,
+                      natural_blinks_per_min=args.natural_blinks)
+    print(f"Frases: {result.phrases}  Caracteres: {result.chars_typed}  Correcciones: {result.corrections}  Tiempos agotados: {result.timeouts}  "
+          f"Parpadeos naturales: {result.natural_blinks}")
+    print(f"Tiempo simulado: {result.simulated_s:.1f} s  Tiempo real: {result.wall_s:.1f} s  "
+          f"({result.simulated_s / result.wall_s:.1f}x)")
+    print(f"Caracteres por minuto: {result.cpm:.1f}  Tasa de error: {result.error_rate * 100:.1f}%")
+
+    failed = ((args.min_cpm is not None and result.cpm < args.min_cpm) or
+              (args.max_error_rate is not None and result.error_rate > args.max_error_rate))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
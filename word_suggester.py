@@ -1,16 +1,88 @@
 # word_suggester.py
+import heapq
+import math
+import unicodedata
+from array import array
+from collections import OrderedDict
+import numpy as np
 import config
+from lexicon import load_lexicon
+
+FUZZY_CHILDREN_CACHE_SIZE = 20000
+
+def _fold_accents(char):
+    # 'á' -> 'a', 'ü' -> 'u'; el teclado no tiene tildes, así que no cuentan como error
+    return unicodedata.normalize('NFD', char)[0]
+
+class RankIndex:
+    """
+    Las k palabras mejor clasificadas de cualquier rango [lo, hi) del léxico en O(k log k),
+    sin recorrer el rango: tabla dispersa de mínimos (RMQ) sobre la posición de cada palabra
+    en el orden global (más frecuente primero; a igual frecuencia, la más corta).
+    """
+    def __init__(self, lexicon):
+        count = len(lexicon)
+        freqs = np.array(lexicon.frequencies(), dtype=np.int64)
+        lengths = np.diff(np.array(lexicon.offsets(), dtype=np.int64))
+        order = np.lexsort((np.arange(count), lengths, -freqs))
+        rank = np.empty(count, dtype=np.int32)
+        rank[order] = np.arange(count, dtype=np.int32)
+        self.order = array('i', order.astype(np.int32).tobytes())
+        # levels[k][i] = menor rango en [i, i + 2^k)
+        self.levels = [array('i', rank.tobytes())]
+        level, width = rank, 1
+        while 2 * width <= count:
+            level = np.minimum(level[:-width], level[width:])
+            self.levels.append(array('i', level.tobytes()))
+            width *= 2
+
+    def min_rank(self, lo, hi):
+        k = (hi - lo).bit_length() - 1
+        level = self.levels[k]
+        return min(level[lo], level[hi - (1 << k)])
+
+    def best(self, ranges, count, exclude=None):
+        """
+        Hasta count índices de palabras de los rangos [(orden, lo, hi)], ordenados por
+        (orden, clasificación). Las palabras repetidas o en `exclude` (un rango) se saltan.
+        """
+        return [i for _, _, i in self.best_keyed(ranges, count, exclude)]
+
+    def best_keyed(self, ranges, count, exclude=None):
+        """Como best, pero devuelve [(orden, clasificación, índice)]."""
+        heap = [(key, self.min_rank(lo, hi), lo, hi) for key, lo, hi in ranges if lo < hi]
+        heapq.heapify(heap)
+        seen = set()
+        result = []
+        while heap and len(result) < count:
+            key, rank, lo, hi = heapq.heappop(heap)
+            i = self.order[rank]
+            if i not in seen and not (exclude and exclude[0] <= i < exclude[1]):
+                seen.add(i)
+                result.append((key, rank, i))
+            if lo < i: heapq.heappush(heap, (key, self.min_rank(lo, i), lo, i))
+            if i + 1 < hi: heapq.heappush(heap, (key, self.min_rank(i + 1, hi), i + 1, hi))
+        return result
+
 
 class WordSuggester:
-    def __init__(self, filepath=config.SPANISH_WORDS_FILE):
+    def __init__(self, filepath=config.SPANISH_WORDS_FILE, key_positions=None):
         self.words = []
+        # key_positions: {letra: (x, y)} del teclado en pantalla (Keyboard.get_key_centers)
+        self.key_positions = key_positions or {}
+        self.key_pitch = config.KEY_WIDTH + config.KEY_MARGIN
+        self._substitution_costs = {}
+        self._folded_chars = {}
+        # Menor costo de edición no nulo (sustituir por la tecla más cercana o insertar/borrar)
+        self._min_edit_cost = min([config.FUZZY_EDIT_COST] + [
+            self._substitution_cost(a, b) for a in self.key_positions for b in self.key_positions if a != b and len(a) == len(b) == 1])
+        self._children_cache = OrderedDict()
+        self.rank_index = None
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    word = line.strip().lower()
-                    if word and len(word) > 1 and word.isalpha():
-                        self.words.append(word)
+            # Léxico compilado y mapeado en memoria; se recompila solo si el texto cambió
+            self.words = load_lexicon(filepath)
             if self.words:
+                 self.rank_index = RankIndex(self.words)
                  print(f"Cargadas {len(self.words)} palabras desde {filepath}")
             else:
                  print(f"Advertencia: No se cargaron palabras válidas desde {filepath}")
@@ -19,12 +91,129 @@ class WordSuggester:
         except Exception as e:
             print(f"Error cargando palabras: {e}")
 
+    def _substitution_cost(self, typed_char, word_char):
+        """
+        Costo de que se haya tecleado typed_char queriendo word_char: proporcional a la
+        distancia física entre las teclas (una tecla vecina cuesta FUZZY_ADJACENT_KEY_COST).
+        """
+        key = (typed_char, word_char)
+        cost = self._substitution_costs.get(key)
+        if cost is None:
+            base_char = _fold_accents(word_char)
+            if base_char == typed_char:
+                cost = 0.0
+            elif typed_char in self.key_positions and base_char in self.key_positions:
+                (x1, y1), (x2, y2) = self.key_positions[typed_char], self.key_positions[base_char]
+                distance_in_keys = math.hypot(x1 - x2, y1 - y2) / self.key_pitch
+                cost = min(config.FUZZY_EDIT_COST, config.FUZZY_ADJACENT_KEY_COST * distance_in_keys)
+            else:
+                cost = config.FUZZY_EDIT_COST
+            self._substitution_costs[key] = cost
+        return cost
+
+    def _children(self, lo, hi, byte_depth):
+        # Los nodos altos del trie se repiten en cada pulsación: se guardan sus hijos
+        key = (lo, hi, byte_depth)
+        children = self._children_cache.get(key)
+        if children is None:
+            if len(self._children_cache) >= FUZZY_CHILDREN_CACHE_SIZE: self._children_cache.popitem(last=False)
+            # Tupla de tuplas: el recolector de basura deja de rastrearlas (sin pausas con la caché llena)
+            children = self._children_cache[key] = tuple(self.words.children(lo, hi, byte_depth))
+        else:
+            self._children_cache.move_to_end(key)  # LRU: los nodos altos nunca se desalojan
+        return children
+
+    def _fuzzy_prefix_ranges(self, prefix, max_cost, needed, exclude=(0, 0)):
+        """
+        Búsqueda con distancia de edición acotada sobre el trie implícito del léxico.
+        Devuelve [(costo, lo, hi)]: las palabras [lo, hi) empiezan por algo a distancia `costo` de prefix.
+        Solo se calculan las celdas de la banda alcanzable (|profundidad - j| <= max_cost / FUZZY_EDIT_COST).
+        Los nodos se visitan por (costo mínimo posible, mejor clasificación de sus palabras), que
+        acota por abajo el orden (costo, clasificación) de todo lo que queda en el nodo. Así la
+        búsqueda se detiene en cuanto hay `needed` palabras (fuera de `exclude`) mejores que el
+        siguiente nodo pendiente, y nunca visita más de FUZZY_MAX_NODES nodos.
+        """
+        edit = config.FUZZY_EDIT_COST
+        n = len(prefix)
+        band = int(max_cost // edit)
+        substitution_rows = {}
+        matches = []
+        worst_needed = None  # (costo, clasificación) de la needed-ésima mejor palabra encontrada
+        checked_matches = 0
+        heap = [(0.0, self.rank_index.min_rank(0, len(self.words)), 0, len(self.words), 0, 0, [j * edit for j in range(n + 1)])]
+        visited = 0
+        while heap and visited < config.FUZZY_MAX_NODES:
+            lower_bound, min_rank, lo, hi, byte_depth, depth, row = heapq.heappop(heap)
+            if len(matches) > checked_matches:
+                # Solo se recalcula si hubo coincidencias nuevas (los rangos anidados se deduplican)
+                checked_matches = len(matches)
+                found = self.rank_index.best_keyed(matches, needed, exclude)
+                if len(found) >= needed: worst_needed = found[-1][:2]
+            if worst_needed is not None and worst_needed < (lower_bound, min_rank):
+                break
+            visited += 1
+            depth += 1
+            j_min, j_max = max(1, depth - band), min(n, depth + band)
+            # Sin margen para otra edición: solo sobreviven los hijos que repiten una letra tecleada
+            allowed = None
+            if lower_bound + self._min_edit_cost > max_cost:
+                allowed = {prefix[j - 1] for j in range(j_min, j_max + 1) if row[j - 1] <= max_cost}
+            for char, child_lo, child_hi in self._children(lo, hi, byte_depth):
+                if allowed is not None:
+                    folded = self._folded_chars.get(char)
+                    if folded is None: folded = self._folded_chars[char] = _fold_accents(char)
+                    if folded not in allowed: continue
+                sub = substitution_rows.get(char)
+                if sub is None:
+                    sub = substitution_rows[char] = [self._substitution_cost(c, char) for c in prefix]
+                new_row = [math.inf] * (n + 1)
+                if depth <= band: new_row[0] = depth * edit
+                for j in range(j_min, j_max + 1):
+                    new_row[j] = min(row[j] + edit, new_row[j - 1] + edit, row[j - 1] + sub[j - 1])
+                best = min(new_row)
+                if best > max_cost:
+                    continue
+                if new_row[n] <= max_cost:
+                    matches.append((new_row[n], child_lo, child_hi))
+                    # Más abajo el costo no puede bajar de min(new_row)
+                    if best >= new_row[n]:
+                        continue
+                heapq.heappush(heap, (best, self.rank_index.min_rank(child_lo, child_hi), child_lo, child_hi,
+                                      byte_depth + len(char.encode('utf-8')), depth, new_row))
+        return matches
+
+    def next_letter_probabilities(self, current_word_prefix):
+        """
+        Probabilidad de cada tecla como siguiente pulsación según las palabras del léxico que
+        continúan el prefijo ({'a': 0.4, ...}; ' ' si el prefijo ya es una palabra completa).
+        """
+        if not self.words: return {}
+        prefix = current_word_prefix.lower()
+        lo, hi = self.words.prefix_range(prefix)
+        if lo >= hi: return {}
+        prefix_bytes = prefix.encode('utf-8')
+        counts = {}
+        for char, child_lo, child_hi in self._children(lo, hi, len(prefix_bytes)):
+            key_char = _fold_accents(char)
+            counts[key_char] = counts.get(key_char, 0) + (child_hi - child_lo)
+        if prefix and self.words.word_bytes(lo) == prefix_bytes:
+            counts[' '] = counts.get(' ', 0) + 1
+        total = sum(counts.values())
+        return {char: n / total for char, n in counts.items()}
+
     def get_suggestions(self, current_word_prefix, count=config.SUGGESTION_COUNT):
         if not current_word_prefix or not self.words:
             return []
 
         current_word_prefix = current_word_prefix.lower()
-        suggestions = [word for word in self.words if word.startswith(current_word_prefix)]
+        lo, hi = self.words.prefix_range(current_word_prefix)
+        best = self.rank_index.best([(0, lo, hi)], count)
+        if len(best) >= count or len(current_word_prefix) < config.FUZZY_MIN_PREFIX_LENGTH:
+            return [self.words[i] for i in best]
 
-        suggestions.sort(key=len)
-        return suggestions[:count]
\ No newline at end of file
+        # Completar con coincidencias aproximadas (teclas vecinas, letras de más o de menos),
+        # siempre detrás de las exactas y ordenadas por costo y luego por frecuencia
+        needed = count - len(best)
+        ranges = self._fuzzy_prefix_ranges(current_word_prefix, config.FUZZY_MAX_COST, needed, (lo, hi))
+        fuzzy = self.rank_index.best(ranges, needed, exclude=(lo, hi))
+        return [self.words[i] for i in best + fuzzy]